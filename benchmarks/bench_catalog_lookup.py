@@ -0,0 +1,46 @@
+"""Compare per-row report lookup in the results loop: linear scan vs the catalog id index.
+
+Run from the repo root:  python benchmarks/bench_catalog_lookup.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from report_catalog import CatalogSnapshot  # noqa: E402
+
+SOURCES = ["Avendus", "SBI Securities", "Deven Choksey Research", "Kotak", "ICICI Securities"]
+
+
+def synthetic_docs(n):
+    return [{
+        "_id": f"researchreportss_{i}",
+        "title": f"Report {i}",
+        "company_names": [f"Company {i % 997}", f"Company {i % 89}"],
+        "category": ["Sectoral", "Brokerage", "IPO"][i % 3],
+        "published_date": f"2025-{i % 12 + 1:02d}-{i % 28 + 1:02d}",
+        "metadata": {"source": SOURCES[i % len(SOURCES)]},
+    } for i in range(n)]
+
+
+def time_loop(ids, lookup):
+    start = time.perf_counter()
+    for pdf_id in ids:
+        lookup(pdf_id)
+    return time.perf_counter() - start
+
+
+def main(sizes=(1000, 2000, 5000, 10000)):
+    print(f"{'reports':>8} {'linear scan (s)':>16} {'id index (s)':>13}")
+    for n in sizes:
+        docs = synthetic_docs(n)
+        snapshot = CatalogSnapshot.from_docs(docs)
+        ids = list(snapshot.df.index)
+        linear = time_loop(ids, lambda pdf_id: next((d for d in docs if d["_id"] == pdf_id), None))
+        indexed = time_loop(ids, snapshot.get)
+        print(f"{n:>8} {linear:>16.3f} {indexed:>13.5f}")
+
+
+if __name__ == "__main__":
+    main()
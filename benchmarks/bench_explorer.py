@@ -0,0 +1,250 @@
+"""End-to-end explorer benchmark on a synthetic corpus at increasing scale.
+
+Each size seeds ResearchReportTest4dot1-shaped documents (FIELD_ORDER schema)
+into mongomock (pip install mongomock), or a local mongod with --mongo-uri,
+renders the matching HTML files with render_reports, then times catalog
+load, every filter combination (in memory and in Mongo), a results page and
+render_sectoral_report. Results are JSON with throughput and p50/p95.
+
+Run from the repo root:
+    python benchmarks/bench_explorer.py --sizes 1000 10000 --out bench.json
+    python benchmarks/bench_explorer.py --sizes 100000 --mongo-uri mongodb://localhost:27017
+"""
+import argparse
+import datetime
+import itertools
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from render_reports import render_all  # noqa: E402
+from report_catalog import (  # noqa: E402
+    CatalogSnapshot, build_filter_query, ensure_indexes, filter_catalog, load_catalog, page_slice,
+)
+from report_renderer import FIELD_ORDER, render_sectoral_report  # noqa: E402
+from report_store import read_report, report_cache, report_exists  # noqa: E402
+
+SOURCES = ["Avendus", "SBI Securities", "Deven Choksey Research", "Kotak", "ICICI Securities", "Motilal Oswal"]
+CATEGORIES = ["Sectoral", "Brokerage", "IPO"]
+SECTORS = ["Quick Commerce", "Cement", "Banking", "IT Services", "Pharma", "Auto", "FMCG", "Real Estate"]
+SENTIMENTS = ["Positive", "Neutral", "Negative"]
+COMPANY_COUNT = 500
+WORDS = (
+    "margin growth demand volume pricing capacity guidance order book revenue ebitda outlook "
+    "competition regulation inflation monsoon credit deposit utilisation expansion valuation"
+).split()
+
+# Filter combinations timed at every size: (companies, categories, sources, date_range)
+FILTERS = {
+    "none": ((), (), (), ()),
+    "company": (("Company 7",), (), (), ()),
+    "category": ((), ("Sectoral",), (), ()),
+    "source": ((), (), ("Kotak", "Avendus"), ()),
+    "date_range": ((), (), (), (datetime.date(2025, 3, 1), datetime.date(2025, 5, 31))),
+    "company+source": (("Company 7", "Company 11"), (), ("Kotak",), ()),
+    "all": (("Company 7",), ("Sectoral", "Brokerage"), ("Kotak", "Avendus"),
+            (datetime.date(2025, 1, 1), datetime.date(2025, 12, 31))),
+}
+
+
+def _sentence(rng, n=12):
+    return " ".join(rng.choice(WORDS) for _ in range(n)).capitalize() + "."
+
+
+def synthetic_doc(i):
+    # Deterministic per index, so the corpus can be regenerated instead of held in memory
+    rng = random.Random(i)
+    companies = [f"Company {n}" for n in rng.sample(range(COMPANY_COUNT), rng.randint(1, 4))]
+    published = datetime.date(2025, 1, 1) + datetime.timedelta(days=rng.randrange(365))
+    periods = ["FY24", "FY25", "FY26E"]
+    return {
+        "_id": f"researchreportss_{i}",
+        "status": "analysed",
+        "title": f"{rng.choice(SECTORS)} update {i}",
+        "company_names": companies,
+        "category": rng.choice(CATEGORIES),
+        "auto_category": rng.choice(CATEGORIES),
+        "published_date": published.strftime("%Y-%m-%d"),
+        "file_name": f"report_{i}.pdf",
+        "metadata": {
+            "source": rng.choice(SOURCES),
+            "file_name": f"report_{i}.pdf",
+            "text_preview": _sentence(rng, 40),
+        },
+        "updated_at": datetime.datetime(2025, 1, 1) + datetime.timedelta(seconds=i),
+        "sector": rng.choice(SECTORS),
+        "period_covered": "Q1 FY26",
+        "analysts": [f"Analyst {rng.randrange(50)}"],
+        "executive_summary": " ".join(_sentence(rng) for _ in range(4)),
+        "overall_sentiment": rng.choice(SENTIMENTS),
+        "overall_sentiment_triggers": [_sentence(rng, 8) for _ in range(3)],
+        "sector_highlights": [_sentence(rng) for _ in range(4)],
+        "industry_metrics_tables": [{
+            "title": "Key financials",
+            "description": _sentence(rng, 6),
+            "table_data": "Metric," + ",".join(periods) + "\n" + "\n".join(
+                f"{metric}," + ",".join(f"{rng.uniform(10, 5000):.1f}" for _ in periods)
+                for metric in ("Revenue", "EBITDA", "PAT", "EPS")
+            ),
+        }],
+        "charts_and_figures": [{"title": f"Figure {n}", "description": _sentence(rng, 8)} for n in range(2)],
+        "macro_trends": [_sentence(rng) for _ in range(3)],
+        "headwinds_tailwinds": {"headwinds": [_sentence(rng, 8)], "tailwinds": [_sentence(rng, 8)]},
+        "key_statistics": {"Market size (INR bn)": f"{rng.uniform(100, 9000):.0f}", "CAGR": f"{rng.uniform(5, 30):.1f}%"},
+        "top_companies": [
+            {"name": name, "performance_summary": _sentence(rng, 10), "rationale": _sentence(rng, 8)}
+            for name in companies[:2]
+        ],
+        "weak_companies": [{"name": companies[-1], "performance_summary": _sentence(rng, 10)}],
+        "company_wise_detail": [{
+            "name": name,
+            "sentiment": rng.choice(SENTIMENTS),
+            "brief_summary": _sentence(rng, 20),
+            "sentiment_triggers": [_sentence(rng, 6) for _ in range(2)],
+            "metrics": f"Revenue growth {rng.uniform(-5, 40):.1f}% YoY",
+            "outlook_guidance": _sentence(rng, 10),
+        } for name in companies],
+        "conclusion": _sentence(rng, 20),
+        "data_sources": ["Company filings", "Industry data"],
+        "sector_specific": {"Channel checks": _sentence(rng, 8)},
+    }
+
+
+def seed(collection, n, batch_size=1000):
+    collection.drop()
+    for start in range(0, n, batch_size):
+        collection.insert_many([synthetic_doc(i) for i in range(start, min(n, start + batch_size))])
+    ensure_indexes(collection)
+
+
+def summarise(timings, items=1):
+    timings = np.array(timings) * 1000
+    return {
+        "runs": len(timings),
+        "mean_ms": round(float(timings.mean()), 3),
+        "p50_ms": round(float(np.percentile(timings, 50)), 3),
+        "p95_ms": round(float(np.percentile(timings, 95)), 3),
+        "max_ms": round(float(timings.max()), 3),
+        "items_per_run": items,
+        "items_per_s": round(items * 1000 / float(timings.mean()), 1) if timings.mean() else None,
+    }
+
+
+def measure(fn, repeat, items=1):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return summarise(timings, items)
+
+
+def bench_size(collection, n, html_dir, repeat, page_size, render_sample, workers):
+    results = []
+
+    def record(name, stats):
+        results.append({"size": n, "benchmark": name, **stats})
+        print(f"{n:>7} {name:<32} p50 {stats['p50_ms']:>10.2f} ms  p95 {stats['p95_ms']:>10.2f} ms", file=sys.stderr)
+
+    start = time.perf_counter()
+    seed(collection, n)
+    render_all((synthetic_doc(i) for i in range(n)), out_dir=html_dir, workers=workers)
+    print(f"{n:>7} corpus ready in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+    record("catalog_load", measure(
+        lambda: CatalogSnapshot.from_docs(load_catalog(collection)), max(1, repeat // 5), items=n,
+    ))
+    snapshot = CatalogSnapshot.from_docs(load_catalog(collection))
+    memory = snapshot.memory_usage()
+    results.append({"size": n, "benchmark": "catalog_memory", **memory})
+    print(f"{n:>7} {'catalog_memory':<32} {memory['frame_bytes'] / 1024 / 1024:.1f} MB, "
+          f"{memory['bytes_per_report']} B/report", file=sys.stderr)
+
+    for name, args in FILTERS.items():
+        record(f"filter_memory[{name}]", measure(lambda: filter_catalog(snapshot, *args), repeat))
+        record(f"filter_mongo[{name}]", measure(
+            lambda: load_catalog(collection, query=build_filter_query(*args)), max(1, repeat // 5),
+        ))
+
+    filtered = filter_catalog(snapshot, *FILTERS["none"])
+
+    def results_page():
+        # What one rerun of the explorer does for the rows it shows, with every report opened
+        report_cache.clear()
+        for row in page_slice(filtered, "Published Date", True, 1, page_size).to_dict("records"):
+            if report_exists(row["PDF ID"], html_dir):
+                read_report(row["PDF ID"], html_dir)
+
+    record("results_page", measure(results_page, repeat, items=min(page_size, n)))
+
+    timings = []
+    for i in range(min(n, render_sample)):
+        doc = synthetic_doc(i)
+        start = time.perf_counter()
+        render_sectoral_report(doc, FIELD_ORDER)
+        timings.append(time.perf_counter() - start)
+    record("render_sectoral_report", summarise(timings))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--mongo-uri", help="local mongod to use instead of mongomock")
+    parser.add_argument("--db", default="explorer_bench", help="database seeded (and dropped) on --mongo-uri")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--page-size", type=int, default=25)
+    parser.add_argument("--render-sample", type=int, default=500, help="documents timed through the renderer")
+    parser.add_argument("--workers", type=int, default=None, help="processes rendering the HTML corpus")
+    parser.add_argument("--out", help="write JSON results here instead of stdout")
+    args = parser.parse_args()
+
+    if args.mongo_uri:
+        from pymongo import MongoClient
+        client, backend = MongoClient(args.mongo_uri), "mongod"
+    else:
+        import mongomock
+        client, backend = mongomock.MongoClient(), "mongomock"
+    collection = client[args.db]["ResearchReportTest4dot1"]
+
+    html_dir = tempfile.mkdtemp(prefix="bench_explorer_")
+    try:
+        results = list(itertools.chain.from_iterable(
+            bench_size(collection, n, html_dir, args.repeat, args.page_size, args.render_sample, args.workers)
+            for n in sorted(args.sizes)
+        ))
+    finally:
+        shutil.rmtree(html_dir, ignore_errors=True)
+        if args.mongo_uri:
+            client.drop_database(args.db)
+
+    output = {
+        "meta": {
+            "backend": backend,
+            "created": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "repeat": args.repeat,
+            "page_size": args.page_size,
+        },
+        "results": results,
+    }
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(output, f, indent=1)
+    else:
+        json.dump(output, sys.stdout, indent=1)
+
+
+if __name__ == "__main__":
+    main()
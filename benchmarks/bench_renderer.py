@@ -0,0 +1,107 @@
+"""Micro-benchmark: legacy pandas-based renderer vs the registry/streaming renderer.
+
+Source documents are rebuilt from the reports in html_files/ (sections become
+fields, every table becomes an industry_metrics_tables CSV entry).
+
+Run from the repo root:  python benchmarks/bench_renderer.py
+"""
+import csv
+import io
+import os
+import sys
+import time
+from html import escape
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd  # noqa: E402
+
+from report_parser import parse_report_html  # noqa: E402
+from report_renderer import (  # noqa: E402
+    FIELD_ORDER, LIST_FIELD_RENDERERS, REPORT_CSS, STYLESHEET_NAME, render_sectoral_report, write_sectoral_report,
+)
+from report_store import HTML_DIR  # noqa: E402
+
+
+def doc_from_html(html):
+    report = parse_report_html(html)
+    doc = {"title": report["title"], "industry_metrics_tables": []}
+    for heading, section in report["sections"].items():
+        for table in section["tables"]:
+            buf = io.StringIO()
+            csv.writer(buf).writerows(table["rows"])
+            doc["industry_metrics_tables"].append(
+                {"title": table["title"] or heading, "table_data": buf.getvalue(), "description": ""}
+            )
+        if section["tables"]:
+            continue
+        key = heading.lower().replace(" ", "_")
+        if key in LIST_FIELD_RENDERERS:
+            # Those fields hold structured dicts, not the flattened text parsed back here
+            key += "_text"
+        if section["items"]:
+            doc[key] = section["items"]
+        elif section["text"]:
+            doc[key] = " ".join(section["text"])
+    return doc
+
+
+def legacy_render_table(table_data, description=""):
+    try:
+        df = pd.read_csv(io.StringIO(table_data))
+        return f"<div><p>{escape(description)}</p>{df.to_html(index=False, border=1)}</div>"
+    except Exception:
+        return f"<div><p>{escape(description)}</p><pre>{escape(table_data)}</pre></div>"
+
+
+def legacy_render(data, field_order):
+    # The pre-registry renderer's hot path: inline CSS per report and a DataFrame per table
+    html = [f"<html><head><style>{REPORT_CSS}</style></head><body><div class='report-box'>"]
+    for field in field_order:
+        value = data.get(field)
+        if not value:
+            continue
+        html.append(f"<h3>{field.replace('_',' ').title()}</h3>")
+        if field == "industry_metrics_tables":
+            for tbl in value:
+                html.append(f"<h4>{escape(tbl['title'])}</h4>")
+                html.append(legacy_render_table(tbl["table_data"], tbl.get("description", "")))
+        elif isinstance(value, list):
+            html.append("<ul>" + "".join(f"<li>{escape(str(item))}</li>" for item in value) + "</ul>")
+        else:
+            html.append(f"<p>{escape(str(value))}</p>")
+    html.append("</div></body></html>")
+    return "\n".join(html)
+
+
+def per_report(fn, docs, field_orders, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for doc, order in zip(docs, field_orders):
+            fn(doc, order)
+    return (time.perf_counter() - start) / (repeat * len(docs)) * 1000
+
+
+def main(repeat=20):
+    docs = []
+    for name in sorted(os.listdir(HTML_DIR)):
+        if name.endswith("_report.html"):
+            with open(os.path.join(HTML_DIR, name), encoding="utf-8") as f:
+                docs.append(doc_from_html(f.read()))
+    field_orders = [FIELD_ORDER + [k for k in doc if k not in FIELD_ORDER and k != "title"] for doc in docs]
+    tables = sum(len(doc["industry_metrics_tables"]) for doc in docs)
+    print(f"{len(docs)} reports, {tables} tables, {repeat} passes")
+
+    legacy = per_report(legacy_render, docs, field_orders, repeat)
+    current = per_report(render_sectoral_report, docs, field_orders, repeat)
+    streamed = per_report(
+        lambda doc, order: write_sectoral_report(doc, order, io.StringIO(), stylesheet=STYLESHEET_NAME),
+        docs, field_orders, repeat,
+    )
+    print(f"legacy (pandas tables, inline CSS): {legacy:8.3f} ms/report")
+    print(f"registry renderer:                  {current:8.3f} ms/report  ({legacy / current:5.1f}x)")
+    print(f"streamed, shared stylesheet:        {streamed:8.3f} ms/report  ({legacy / streamed:5.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import base64
+import hashlib
+import hmac
+import os
+
+
+# scrypt cost parameters (~16 MB, tens of ms per hash); stored with each hash so they can be raised later
+SCRYPT_N = 2 ** 14
+SCRYPT_R = 8
+SCRYPT_P = 1
+PREFIX = "scrypt"
+# Stored parameters are data; refuse ones that would make a login burn gigabytes
+MAX_SCRYPT_MEMORY = 2 ** 28
+
+
+def _b64(data):
+    return base64.b64encode(data).decode("ascii")
+
+
+def hash_password(password, n=SCRYPT_N, r=SCRYPT_R, p=SCRYPT_P):
+    salt = os.urandom(16)
+    digest = hashlib.scrypt(password.encode("utf-8"), salt=salt, n=n, r=r, p=p, maxmem=2 * 128 * r * n)
+    return f"{PREFIX}${n}${r}${p}${_b64(salt)}${_b64(digest)}"
+
+
+def is_hashed(stored):
+    return isinstance(stored, str) and stored.startswith(PREFIX + "$")
+
+
+def _parse(stored):
+    # (n, r, p, salt, digest), or None for anything that isn't a well-formed hash
+    try:
+        _, n, r, p, salt, digest = stored.split("$")
+        n, r, p = int(n), int(r), int(p)
+        salt, digest = base64.b64decode(salt, validate=True), base64.b64decode(digest, validate=True)
+    except ValueError:
+        return None
+    if not digest or n < 2 or n & (n - 1) or r < 1 or not 0 < p <= 16 or 128 * r * n > MAX_SCRYPT_MEMORY:
+        return None
+    return n, r, p, salt, digest
+
+
+def verify_password(password, stored):
+    if not password or not stored:
+        return False
+    if not is_hashed(stored):
+        # Legacy plaintext record; callers should rehash on success
+        return hmac.compare_digest(password.encode("utf-8"), str(stored).encode("utf-8"))
+    parsed = _parse(stored)
+    if parsed is None:
+        return False
+    n, r, p, salt, expected = parsed
+    try:
+        actual = hashlib.scrypt(
+            password.encode("utf-8"), salt=salt, n=n, r=r, p=p, maxmem=2 * 128 * r * n, dklen=len(expected),
+        )
+    except ValueError:
+        return False
+    return hmac.compare_digest(actual, expected)
+
+
+def needs_rehash(stored):
+    parsed = _parse(stored) if is_hashed(stored) else None
+    return parsed is None or parsed[:3] != (SCRYPT_N, SCRYPT_R, SCRYPT_P)
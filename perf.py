@@ -0,0 +1,83 @@
+"""Per-rerun timers and counters for the explorer.
+
+The app starts a RerunMetrics at the top of each script run; library code
+reports into it through the module-level timer()/count() helpers, which are
+no-ops when no rerun is being measured (CLIs, benchmarks).
+"""
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+
+logger = logging.getLogger("explorer.perf")
+if not logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+# Each Streamlit session runs its script on its own thread
+_active = threading.local()
+
+
+class RerunMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.timings = {}
+        self.calls = {}
+        self.counters = {}
+
+    @contextmanager
+    def timer(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - start
+            self.calls[name] = self.calls.get(name, 0) + 1
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def summary(self):
+        return {
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 2),
+            "timings_ms": {name: round(seconds * 1000, 2) for name, seconds in self.timings.items()},
+            "calls": dict(self.calls),
+            "counters": dict(self.counters),
+        }
+
+    def log(self, **fields):
+        # One JSON object per rerun, e.g. {"event": "rerun", "user": ..., "total_ms": ...}
+        record = {"event": "rerun", **fields, **self.summary()}
+        logger.info(json.dumps(record, default=str))
+        return record
+
+
+def start_rerun():
+    metrics = RerunMetrics()
+    _active.metrics = metrics
+    return metrics
+
+
+def current():
+    return getattr(_active, "metrics", None)
+
+
+@contextmanager
+def timer(name):
+    metrics = current()
+    if metrics is None:
+        yield
+    else:
+        with metrics.timer(name):
+            yield
+
+
+def count(name, n=1):
+    metrics = current()
+    if metrics is not None:
+        metrics.count(name, n)
@@ -0,0 +1,201 @@
+"""Batch-render analysed sectoral reports to html_files/ across a process pool.
+
+    python render_reports.py --query '{"sector": "Cement"}' --workers 8
+    python render_reports.py --jsonl dump.jsonl --force
+    python render_reports.py --jsonl dump.jsonl --store report_blobs
+
+Reports whose source document (and renderer) are unchanged since the last
+run are skipped, using the fingerprints stored in the render manifest.
+
+Only the Sectoral category is rendered unless --all-categories is given: the
+sectoral template has no Recommendation/KPI sections or title header, which
+brokerage and IPO reports (and report_parser) rely on. Report files already
+in the output directory that this script did not write (they are not in its
+manifest) are left alone unless --overwrite is given.
+"""
+import argparse
+import hashlib
+import json
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import bson
+from bson import json_util
+from pymongo import MongoClient
+
+import report_renderer
+from report_catalog import ANALYSED_QUERY
+from report_store import HTML_DIR, BlobStore, report_path
+
+MANIFEST_NAME = "render_manifest.json"
+SECTORAL_QUERY = {"category": "Sectoral"}
+# Documents per worker task: enough to amortise pickling and scheduling per task
+CHUNK_SIZE = 64
+
+
+def renderer_version():
+    # Any edit to the renderer module invalidates every fingerprint
+    with open(report_renderer.__file__, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()[:16]
+
+
+def fingerprint(doc, version):
+    # BSON is the C encoder, several times cheaper than sorted JSON; a document
+    # whose fields come back reordered just renders once more
+    payload = bson.encode(doc)
+    return hashlib.sha256(version.encode("ascii") + payload).hexdigest()
+
+
+def load_manifest(out_dir):
+    path = os.path.join(out_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(out_dir, manifest):
+    path = os.path.join(out_dir, MANIFEST_NAME)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def render_one(doc, out_dir):
+    # Write to a temp file so readers never see a partial report
+    path = report_path(doc["_id"], out_dir)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        report_renderer.write_sectoral_report(
+            doc, report_renderer.FIELD_ORDER, f, stylesheet=report_renderer.STYLESHEET_NAME
+        )
+    os.replace(tmp_path, path)
+    return doc["_id"]
+
+
+def iter_mongo_docs(uri, query, all_categories=False):
+    collection = MongoClient(uri)["CAG_CHATBOT"]["ResearchReportTest4dot1"]
+    # A category in --query replaces the Sectoral default
+    yield from collection.find({**ANALYSED_QUERY, **({} if all_categories else SECTORAL_QUERY), **query})
+
+
+def iter_jsonl_docs(path, all_categories=False):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                doc = json_util.loads(line)
+                if all_categories or doc.get("category") == SECTORAL_QUERY["category"]:
+                    yield doc
+
+
+def write_stylesheet(out_dir):
+    with open(os.path.join(out_dir, report_renderer.STYLESHEET_NAME), "w", encoding="utf-8") as f:
+        f.write(report_renderer.REPORT_CSS)
+
+
+def render_chunk(items, out_dir, version, force):
+    # Runs in a worker process: fingerprinting costs about as much as rendering,
+    # so it happens here rather than in the parent. items are (doc, previous fingerprint).
+    results = []
+    for doc, previous in items:
+        pdf_id = doc["_id"]
+        fp = fingerprint(doc, version)
+        if not force and previous == fp and os.path.exists(report_path(pdf_id, out_dir)):
+            results.append((pdf_id, fp, "skipped", None))
+            continue
+        try:
+            render_one(doc, out_dir)
+        except Exception as e:
+            results.append((pdf_id, fp, "failed", str(e)))
+        else:
+            results.append((pdf_id, fp, "rendered", None))
+    return results
+
+
+def _chunks(docs, out_dir, manifest, overwrite, stats, size):
+    chunk = []
+    for doc in docs:
+        pdf_id = doc["_id"]
+        if not overwrite and pdf_id not in manifest and os.path.exists(report_path(pdf_id, out_dir)):
+            # Produced out of band (e.g. the PDF pipeline's richer reports): keep it
+            stats["kept"] += 1
+            continue
+        chunk.append((doc, manifest.get(pdf_id)))
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def render_all(docs, out_dir=HTML_DIR, workers=None, force=False, overwrite=False, chunk_size=CHUNK_SIZE):
+    os.makedirs(out_dir, exist_ok=True)
+    write_stylesheet(out_dir)
+    manifest = load_manifest(out_dir)
+    version = renderer_version()
+    stats = {"rendered": 0, "skipped": 0, "kept": 0, "failed": 0}
+    workers = workers or os.cpu_count() or 1
+    chunks = _chunks(docs, out_dir, manifest, overwrite, stats, chunk_size)
+    try:
+        if workers == 1:
+            # No pool to feed: pickling documents across would be pure overhead
+            for chunk in chunks:
+                _record(render_chunk(chunk, out_dir, version, force), manifest, stats)
+            return stats
+        pending = set()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for chunk in chunks:
+                # Bound the number of documents held in memory while workers catch up
+                if len(pending) >= workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        _record(future.result(), manifest, stats)
+                pending.add(pool.submit(render_chunk, chunk, out_dir, version, force))
+            for future in wait(pending).done:
+                _record(future.result(), manifest, stats)
+    finally:
+        save_manifest(out_dir, manifest)
+    return stats
+
+
+def _record(results, manifest, stats):
+    for pdf_id, fp, outcome, error in results:
+        stats[outcome] += 1
+        if outcome == "failed":
+            print(f"Failed to render {pdf_id}: {error}")
+        else:
+            manifest[pdf_id] = fp
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--query", help="extra Mongo filter (JSON) on top of status=analysed, category=Sectoral")
+    source.add_argument("--jsonl", help="render documents from a JSONL dump instead of Mongo")
+    parser.add_argument("--mongo-uri", default=os.environ.get("MONGO_URI"))
+    parser.add_argument("--out", default=HTML_DIR)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--force", action="store_true", help="re-render even if unchanged")
+    parser.add_argument("--overwrite", action="store_true", help="replace report files this script did not write")
+    parser.add_argument("--all-categories", action="store_true", help="render every category, not just Sectoral")
+    parser.add_argument("--store", help="also import the rendered reports into this compressed blob store")
+    args = parser.parse_args()
+
+    if args.jsonl:
+        docs = iter_jsonl_docs(args.jsonl, args.all_categories)
+    else:
+        if not args.mongo_uri:
+            parser.error("--mongo-uri or MONGO_URI is required with --query")
+        docs = iter_mongo_docs(args.mongo_uri, json_util.loads(args.query), args.all_categories)
+    stats = render_all(docs, out_dir=args.out, workers=args.workers, force=args.force, overwrite=args.overwrite)
+    print(
+        f"Rendered {stats['rendered']}, skipped {stats['skipped']} unchanged, kept {stats['kept']} "
+        f"not written by this script, {stats['failed']} failed"
+    )
+    if args.store:
+        print(f"Stored {BlobStore(args.store).import_html_dir(args.out)} new or changed reports in {args.store}")
+
+
+if __name__ == "__main__":
+    main()
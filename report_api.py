@@ -0,0 +1,202 @@
+"""Headless HTTP API over the report catalog and stored HTML reports.
+
+    python report_api.py --mongo-uri mongodb://... --port 8080 --store report_blobs
+
+    GET /reports?company=&source=&category=&from=&to=&sort=&order=&page=&page_size=
+    GET /reports/{pdf_id}             HTML (ETag / If-None-Match, gzip)
+    GET /export?<same filters>&html=1 every matching analysis document as NDJSON
+
+Shares the explorer's catalog cache, filters and report store, so a request
+costs a filter over the cached catalog instead of a Streamlit rerun.
+"""
+import argparse
+import asyncio
+import datetime
+import os
+
+from aiohttp import web
+from bson import json_util
+from pymongo import MongoClient
+
+from report_catalog import SORT_COLUMNS, CatalogCache, display_frame, filter_catalog, page_count, page_slice
+from report_renderer import REPORT_CSS, STYLESHEET_NAME
+from report_store import HTML_DIR, BlobStore, HtmlDirStore
+
+# Catalog columns as JSON field names
+API_FIELDS = {
+    "PDF ID": "pdf_id", "Title": "title", "Company Names": "company_names", "Category": "category",
+    "Auto Category": "auto_category", "Published Date": "published_date", "Source": "source",
+    "File Name": "file_name",
+}
+MAX_PAGE_SIZE = 500
+EXPORT_BATCH_SIZE = 200
+
+catalog_key = web.AppKey("catalog", CatalogCache)
+store_key = web.AppKey("store", object)
+collection_key = web.AppKey("collection", object)
+token_key = web.AppKey("token", str)
+ttl_key = web.AppKey("ttl", int)
+
+
+def _filters(query):
+    try:
+        date_range = tuple(
+            datetime.date.fromisoformat(query[name]) for name in ("from", "to") if query.get(name)
+        )
+    except ValueError:
+        raise web.HTTPBadRequest(text="from/to must be YYYY-MM-DD dates")
+    if len(date_range) == 1:
+        # An open-ended range runs to (or from) the far end of the catalog
+        date_range = (date_range[0], datetime.date.max) if query.get("from") else (datetime.date.min, date_range[0])
+    return (
+        query.getall("company", []), query.getall("category", []), query.getall("source", []), date_range,
+    )
+
+
+def _int_param(query, name, default, minimum=1, maximum=None):
+    try:
+        value = int(query.get(name, default))
+    except ValueError:
+        raise web.HTTPBadRequest(text=f"{name} must be an integer")
+    return max(minimum, min(value, maximum) if maximum else value)
+
+
+async def _filtered(request):
+    loop = asyncio.get_running_loop()
+    snapshot = await loop.run_in_executor(None, request.app[catalog_key].get)
+    return filter_catalog(snapshot, *_filters(request.query))
+
+
+async def list_reports(request):
+    df = await _filtered(request)
+    query = request.query
+    page_size = _int_param(query, "page_size", 25, maximum=MAX_PAGE_SIZE)
+    pages = page_count(len(df), page_size)
+    page = _int_param(query, "page", 1, maximum=pages)
+    sort_by = SORT_COLUMNS.get(query.get("sort", "Published date"), "Published Date")
+    page_df = display_frame(page_slice(df, sort_by, query.get("order", "desc") != "asc", page, page_size))
+    store = request.app[store_key]
+    reports = []
+    for row in page_df.to_dict("records"):
+        report = {field: row[column] for column, field in API_FIELDS.items()}
+        report["has_report"] = store.exists(row["PDF ID"])
+        report["url"] = f"/reports/{row['PDF ID']}"
+        reports.append(report)
+    return web.json_response({
+        "total": len(df), "page": page, "pages": pages, "page_size": page_size, "reports": reports,
+    })
+
+
+async def get_report(request):
+    pdf_id = request.match_info["pdf_id"]
+    store = request.app[store_key]
+    if not store.exists(pdf_id):
+        raise web.HTTPNotFound(text=f"Report {pdf_id} not found")
+    # Strong validators differ per content-coding, so gzip responses get their own tag
+    gzipped = "gzip" in request.headers.get("Accept-Encoding", "")
+    etag = f'"{store.digest(pdf_id)}-gz"' if gzipped else f'"{store.digest(pdf_id)}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if etag in (tag.strip() for tag in request.headers.get("If-None-Match", "").split(",")):
+        return web.Response(status=304, headers=headers)
+
+    loop = asyncio.get_running_loop()
+    if gzipped and isinstance(store, BlobStore):
+        # Stored blobs are already gzip: send them as they are
+        body = await loop.run_in_executor(None, store.compressed, pdf_id)
+        headers["Content-Encoding"] = "gzip"
+        return web.Response(body=body, content_type="text/html", charset="utf-8", headers=headers)
+    body = await loop.run_in_executor(None, store.read_bytes, pdf_id)
+    response = web.Response(body=body, content_type="text/html", charset="utf-8", headers=headers)
+    if gzipped:
+        response.enable_compression(web.ContentCoding.gzip)
+    return response
+
+
+async def get_stylesheet(request):
+    # Stored reports link "report.css", which resolves here from /reports/{pdf_id}
+    return web.Response(
+        text=REPORT_CSS, content_type="text/css", headers={"Cache-Control": "public, max-age=86400"},
+    )
+
+
+async def export_reports(request):
+    # One analysis document per line, fetched from Mongo in batches and streamed out
+    df = await _filtered(request)
+    with_html = request.query.get("html") in ("1", "true")
+    pdf_ids = list(df.index)
+    response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+    response.enable_compression()
+    await response.prepare(request)
+    loop = asyncio.get_running_loop()
+    collection = request.app[collection_key]
+    store = request.app[store_key]
+    for start in range(0, len(pdf_ids), EXPORT_BATCH_SIZE):
+        batch = pdf_ids[start:start + EXPORT_BATCH_SIZE]
+        docs = await loop.run_in_executor(None, lambda: list(collection.find({"_id": {"$in": batch}})))
+        lines = []
+        for doc in docs:
+            if with_html and store.exists(doc["_id"]):
+                doc["html"] = await loop.run_in_executor(None, store.read_report, doc["_id"])
+            lines.append(json_util.dumps(doc) + "\n")
+        await response.write("".join(lines).encode("utf-8"))
+    await response.write_eof()
+    return response
+
+
+async def _reload_store(app):
+    # Pick up manifests rewritten by render_reports --store while we serve
+    async def reload_loop():
+        while True:
+            await asyncio.sleep(app[ttl_key])
+            await asyncio.get_running_loop().run_in_executor(None, app[store_key].reload)
+
+    task = asyncio.create_task(reload_loop()) if isinstance(app[store_key], BlobStore) else None
+    yield
+    if task is not None:
+        task.cancel()
+
+
+@web.middleware
+async def token_auth(request, handler):
+    token = request.app[token_key]
+    if token and request.headers.get("Authorization") != f"Bearer {token}":
+        raise web.HTTPUnauthorized(text="Missing or invalid bearer token")
+    return await handler(request)
+
+
+def create_app(collection, store, ttl=300, token=None, catalog_snapshot=None):
+    app = web.Application(middlewares=[token_auth])
+    app[catalog_key] = CatalogCache(collection, ttl=ttl, snapshot_path=catalog_snapshot)
+    app[store_key] = store
+    app[ttl_key] = ttl
+    app[collection_key] = collection
+    app[token_key] = token
+    app.cleanup_ctx.append(_reload_store)
+    app.router.add_get("/reports", list_reports)
+    app.router.add_get(f"/reports/{STYLESHEET_NAME}", get_stylesheet)
+    app.router.add_get("/reports/{pdf_id}", get_report)
+    app.router.add_get("/export", export_reports)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--mongo-uri", default=os.environ.get("MONGO_URI"))
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--store", help="compressed blob store to serve (default: flat --html-dir files)")
+    parser.add_argument("--html-dir", default=HTML_DIR)
+    parser.add_argument("--ttl", type=int, default=300, help="catalog refresh interval in seconds")
+    parser.add_argument("--catalog-snapshot", help="Parquet catalog snapshot to start from (shared with the explorer)")
+    parser.add_argument("--token", default=os.environ.get("REPORT_API_TOKEN"), help="required bearer token")
+    args = parser.parse_args()
+    if not args.mongo_uri:
+        parser.error("--mongo-uri or MONGO_URI is required")
+
+    collection = MongoClient(args.mongo_uri)["CAG_CHATBOT"]["ResearchReportTest4dot1"]
+    store = BlobStore(args.store) if args.store else HtmlDirStore(args.html_dir)
+    web.run_app(create_app(collection, store, args.ttl, args.token, args.catalog_snapshot), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,637 @@
+import datetime
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pymongo
+
+import perf
+
+
+# Only the fields the sidebar/listing needs; the analysis body stays in Mongo
+CATALOG_PROJECTION = {
+    "title": 1,
+    "company_names": 1,
+    "category": 1,
+    "auto_category": 1,
+    "published_date": 1,
+    "metadata.source": 1,
+    "metadata.file_name": 1,
+    "file_name": 1,
+    "updated_at": 1,
+}
+
+ANALYSED_QUERY = {"status": "analysed"}
+
+# Compound indexes backing the server-side filters and the updated_at polling
+CATALOG_INDEXES = [
+    [("status", pymongo.ASCENDING), ("company_names", pymongo.ASCENDING), ("published_date", pymongo.DESCENDING)],
+    [("status", pymongo.ASCENDING), ("metadata.source", pymongo.ASCENDING), ("published_date", pymongo.DESCENDING)],
+    [("status", pymongo.ASCENDING), ("category", pymongo.ASCENDING), ("published_date", pymongo.DESCENDING)],
+    [("status", pymongo.ASCENDING), ("published_date", pymongo.DESCENDING)],
+    [("updated_at", pymongo.ASCENDING)],
+]
+
+CATALOG_COLUMNS = [
+    "PDF ID", "Title", "Company Names", "Category", "Auto Category",
+    "Published Date", "Source", "File Name",
+]
+# Few distinct values over many rows: stored as codes into a shared category table
+CATEGORICAL_COLUMNS = ["Category", "Auto Category", "Source"]
+
+
+def iter_catalog_pages(collection, query=None, page_size=1000, projection=CATALOG_PROJECTION):
+    # Keyset pagination on _id: each page resumes after the last _id seen,
+    # so no page costs more than the one before it (unlike skip/limit).
+    base_query = dict(ANALYSED_QUERY if query is None else query)
+    last_id = None
+    while True:
+        page_query = dict(base_query)
+        if last_id is not None:
+            page_query["_id"] = {"$gt": last_id}
+        with perf.timer("mongo_fetch"):
+            page = list(
+                collection.find(page_query, projection)
+                .sort("_id", pymongo.ASCENDING)
+                .limit(page_size)
+            )
+        perf.count("docs_fetched", len(page))
+        if not page:
+            return
+        yield page
+        if len(page) < page_size:
+            return
+        last_id = page[-1]["_id"]
+
+
+def load_catalog(collection, query=None, page_size=1000, projection=CATALOG_PROJECTION):
+    docs = []
+    for page in iter_catalog_pages(collection, query=query, page_size=page_size, projection=projection):
+        docs.extend(page)
+    return docs
+
+
+def catalog_row(doc):
+    metadata = doc.get("metadata", {})
+    return {
+        "PDF ID": doc["_id"],
+        "Title": doc.get("title", ""),
+        "Company Names": ", ".join(doc.get("company_names", [])),
+        "Category": doc.get("category"),
+        "Auto Category": doc.get("auto_category"),
+        "Published Date": doc.get("published_date"),
+        "Source": metadata.get("source"),
+        "File Name": doc.get("file_name", metadata.get("file_name")),
+    }
+
+
+def ensure_indexes(collection):
+    # create_index is a no-op for existing indexes; returns the ones that could
+    # not be created (e.g. the app user lacks createIndex) so callers can warn.
+    missing = []
+    for keys in CATALOG_INDEXES:
+        try:
+            collection.create_index(keys)
+        except pymongo.errors.OperationFailure:
+            missing.append("_".join(f"{field}_{direction}" for field, direction in keys))
+    return missing
+
+
+def build_filter_query(companies=(), categories=(), sources=(), date_range=()):
+    query = dict(ANALYSED_QUERY)
+    if companies:
+        query["company_names"] = {"$in": list(companies)}
+    if categories:
+        query["category"] = {"$in": list(categories)}
+    if sources:
+        query["metadata.source"] = {"$in": list(sources)}
+    if len(date_range) == 2:
+        start, end = (d.strftime("%Y-%m-%d") for d in date_range)
+        query["published_date"] = {"$gte": start, "$lte": end}
+    return query
+
+
+def distinct_options(collection):
+    # One $facet round-trip for all multiselect option lists
+    facets = {
+        "company": [{"$unwind": "$company_names"}, {"$group": {"_id": "$company_names"}}],
+        "category": [{"$group": {"_id": "$category"}}],
+        "source": [{"$group": {"_id": "$metadata.source"}}],
+    }
+    result = next(collection.aggregate([{"$match": ANALYSED_QUERY}, {"$facet": facets}]), {})
+    return {
+        name: sorted(group["_id"] for group in result.get(name, []) if group["_id"] is not None)
+        for name in facets
+    }
+
+
+def load_report(collection, pdf_id):
+    # Full analysis document for a single report, fetched on demand
+    with perf.timer("mongo_fetch"):
+        doc = collection.find_one({"_id": pdf_id})
+    perf.count("docs_fetched", doc is not None)
+    return doc
+
+
+# Secondary indexes kept on every snapshot: name -> keys a catalog doc is filed under
+INDEX_KEYS = {
+    "company": lambda doc: doc.get("company_names", []),
+    "source": lambda doc: [doc.get("metadata", {}).get("source")],
+    "category": lambda doc: [doc.get("category")],
+}
+
+
+def build_index(docs, keys):
+    index = {}
+    for doc in docs:
+        for key in keys(doc):
+            if key is not None:
+                index.setdefault(key, set()).add(doc["_id"])
+    return index
+
+
+def _reindex(index, old_docs, new_docs, keys):
+    # Returns an updated copy; only the sets for touched keys are copied
+    index = dict(index)
+    copied = set()
+    for docs, add in ((old_docs, False), (new_docs, True)):
+        for doc in docs:
+            for key in keys(doc):
+                if key is None:
+                    continue
+                if key not in copied:
+                    index[key] = set(index.get(key, ()))
+                    copied.add(key)
+                if add:
+                    index[key].add(doc["_id"])
+                else:
+                    index[key].discard(doc["_id"])
+    return {key: ids for key, ids in index.items() if ids}
+
+
+def _compact(df):
+    # Categorical labels, datetime64 dates, rows kept in date order (missing
+    # dates last) so date ranges are a binary search over a contiguous block.
+    for column in CATEGORICAL_COLUMNS:
+        df[column] = df[column].astype("category")
+    if not pd.api.types.is_datetime64_any_dtype(df["Published Date"]):
+        df["Published Date"] = pd.to_datetime(df["Published Date"], errors="coerce", format="ISO8601")
+    return df.sort_values("Published Date", kind="stable", na_position="last")
+
+
+def _catalog_frame(docs):
+    df = pd.DataFrame([catalog_row(doc) for doc in docs], columns=CATALOG_COLUMNS)
+    # Index rows by PDF ID as well so single-report lookups are hash lookups
+    df.index = pd.Index(df["PDF ID"])
+    return _compact(df)
+
+
+class CatalogSnapshot:
+    def __init__(self, by_id, df, indexes, watermark=None):
+        self.by_id = by_id
+        self.df = df
+        self.indexes = indexes
+        self.watermark = watermark
+        self.loaded_at = time.time()
+        self._positions = {}
+        self._memory_usage = None
+        dates = df["Published Date"].to_numpy()
+        self._dates = dates[:len(dates) - int(np.isnat(dates).sum())]
+
+    @classmethod
+    def from_docs(cls, docs):
+        by_id = {doc["_id"]: doc for doc in docs}
+        indexes = {name: build_index(docs, keys) for name, keys in INDEX_KEYS.items()}
+        return cls(by_id, _catalog_frame(docs), indexes, _max_updated_at(docs))
+
+    @property
+    def docs(self):
+        return list(self.by_id.values())
+
+    def get(self, pdf_id):
+        return self.by_id.get(pdf_id)
+
+    def ids_for(self, index_name, values):
+        index = self.indexes[index_name]
+        return set().union(*(index.get(value, ()) for value in values))
+
+    def rows(self, pdf_ids):
+        return self.df.loc[[pdf_id for pdf_id in pdf_ids if pdf_id in self.by_id]]
+
+    def options(self, index_name):
+        return sorted(self.indexes[index_name])
+
+    def mask_for(self, index_name, values):
+        # Boolean row mask for exact matches on any of `values`; row positions
+        # per key are resolved once per snapshot and reused by every session.
+        positions = self._positions.get(index_name)
+        if positions is None:
+            positions = {
+                key: self.df.index.get_indexer(list(ids))
+                for key, ids in self.indexes[index_name].items()
+            }
+            self._positions[index_name] = positions
+        mask = np.zeros(len(self.df), dtype=bool)
+        for value in values:
+            if value in positions:
+                mask[positions[value]] = True
+        return mask
+
+    def date_bounds(self, start, end):
+        # Row positions [lo, hi) published within [start, end], by binary search;
+        # open ends (date.min/max) are clamped to what datetime64 can hold
+        start = max(start, pd.Timestamp.min.date() + datetime.timedelta(days=1))
+        end = min(end, pd.Timestamp.max.date())
+        lo = self._dates.searchsorted(np.datetime64(start).astype(self._dates.dtype), side="left")
+        hi = self._dates.searchsorted(np.datetime64(end).astype(self._dates.dtype), side="right")
+        return lo, max(lo, hi)
+
+    def memory_usage(self):
+        # deep=True walks every string; a snapshot never changes, so measure it once
+        if self._memory_usage is None:
+            frame = int(self.df.memory_usage(deep=True).sum())
+            self._memory_usage = {
+                "frame_bytes": frame,
+                "bytes_per_report": round(frame / len(self.df)) if len(self.df) else None,
+            }
+        return self._memory_usage
+
+    def merged(self, changed_docs, removed_ids=()):
+        # Copy-on-write so sessions still reading the old snapshot are unaffected.
+        # Only the changed rows are built in Python; the rest is a vectorised concat.
+        if not changed_docs and not removed_ids:
+            return self
+        touched = set(removed_ids) | {doc["_id"] for doc in changed_docs}
+        old_docs = [self.by_id[pdf_id] for pdf_id in touched if pdf_id in self.by_id]
+        by_id = dict(self.by_id)
+        for pdf_id in touched:
+            by_id.pop(pdf_id, None)
+        by_id.update((doc["_id"], doc) for doc in changed_docs)
+        indexes = {
+            name: _reindex(self.indexes[name], old_docs, changed_docs, keys)
+            for name, keys in INDEX_KEYS.items()
+        }
+        frames = [self.df[~self.df.index.isin(touched)]]
+        if changed_docs:
+            frames.append(_catalog_frame(changed_docs))
+        df = _compact(pd.concat(frames))
+        watermark = max(filter(None, [self.watermark, _max_updated_at(changed_docs)]), default=None)
+        return CatalogSnapshot(by_id, df, indexes, watermark)
+
+
+def filter_catalog(snapshot, companies=(), categories=(), sources=(), date_range=()):
+    # No copies unless needed: the full frame, a date-range slice of it, or
+    # one take of the rows left by the index masks.
+    df = snapshot.df
+    lo, hi = snapshot.date_bounds(*date_range) if len(date_range) == 2 else (0, len(df))
+    mask = None
+    for index_name, values in (("company", companies), ("category", categories), ("source", sources)):
+        if values:
+            values_mask = snapshot.mask_for(index_name, values)[lo:hi]
+            mask = values_mask if mask is None else mask & values_mask
+    if mask is None:
+        return df if (lo, hi) == (0, len(df)) else df.iloc[lo:hi]
+    return df.iloc[lo + np.flatnonzero(mask)]
+
+
+def display_frame(df):
+    # Page rows for display/JSON: dates as YYYY-MM-DD, missing values as ""
+    return df.assign(**{
+        "Published Date": df["Published Date"].dt.strftime("%Y-%m-%d"),
+        **{column: df[column].astype(object) for column in CATEGORICAL_COLUMNS},
+    }).fillna("")
+
+
+SORT_COLUMNS = {"Published date": "Published Date", "Source": "Source", "Title": "Title"}
+
+
+def page_count(total, page_size):
+    return max(1, -(-total // page_size))
+
+
+def page_slice(df, sort_by="Published Date", descending=True, page=1, page_size=25):
+    # Only the rows of the requested page are returned, so callers build
+    # widgets for at most `page_size` reports whatever the result count.
+    # sort_by=None keeps the incoming order (e.g. search relevance).
+    if sort_by is None:
+        ordered = df if descending else df.iloc[::-1]
+    elif df[sort_by].is_monotonic_increasing:
+        # Catalog frames are kept in date order: slicing beats re-sorting
+        ordered = df.iloc[::-1] if descending else df
+    else:
+        ordered = df.sort_values(sort_by, ascending=not descending, na_position="last", kind="stable")
+    start = (page - 1) * page_size
+    return ordered.iloc[start:start + page_size]
+
+
+def _max_updated_at(docs):
+    return max((doc["updated_at"] for doc in docs if doc.get("updated_at")), default=None)
+
+
+# Bump when the snapshot layout or CATALOG_PROJECTION changes; older files are ignored
+SNAPSHOT_VERSION = "2"
+
+# Explicit so a field missing from the first docs isn't dropped for all of them
+SNAPSHOT_SCHEMA = pa.schema([
+    ("_id", pa.string()),
+    ("title", pa.string()),
+    ("company_names", pa.list_(pa.string())),
+    ("category", pa.string()),
+    ("auto_category", pa.string()),
+    ("published_date", pa.string()),
+    ("metadata", pa.struct([("source", pa.string()), ("file_name", pa.string())])),
+    ("file_name", pa.string()),
+    ("updated_at", pa.timestamp("us")),
+])
+
+
+def _snapshot_text(value):
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+def _snapshot_row(doc):
+    metadata = doc.get("metadata") or {}
+    return {
+        "_id": str(doc["_id"]),
+        "title": _snapshot_text(doc.get("title")),
+        "company_names": [_snapshot_text(name) for name in doc["company_names"]] if doc.get("company_names") else None,
+        "category": _snapshot_text(doc.get("category")),
+        "auto_category": _snapshot_text(doc.get("auto_category")),
+        "published_date": _snapshot_text(doc.get("published_date")),
+        "metadata": {
+            "source": _snapshot_text(metadata.get("source")),
+            "file_name": _snapshot_text(metadata.get("file_name")),
+        } if metadata else None,
+        "file_name": _snapshot_text(doc.get("file_name")),
+        "updated_at": doc.get("updated_at") if isinstance(doc.get("updated_at"), datetime.datetime) else None,
+    }
+
+
+def _drop_nulls(value):
+    # Parquet fills absent fields with nulls; drop them so doc.get(field, default) behaves
+    if isinstance(value, dict):
+        return {k: _drop_nulls(v) for k, v in value.items() if v is not None}
+    return value
+
+
+def save_snapshot(snapshot, path):
+    # The projected catalog docs as Parquet, with the refresh watermark alongside
+    table = pa.Table.from_pylist([_snapshot_row(doc) for doc in snapshot.docs], schema=SNAPSHOT_SCHEMA)
+    table = table.replace_schema_metadata({
+        "catalog_snapshot_version": SNAPSHOT_VERSION,
+        "watermark": snapshot.watermark.isoformat() if snapshot.watermark else "",
+    })
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    pq.write_table(table, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def load_snapshot(path):
+    table = pq.read_table(path)
+    metadata = table.schema.metadata or {}
+    if metadata.get(b"catalog_snapshot_version") != SNAPSHOT_VERSION.encode():
+        return None
+    snapshot = CatalogSnapshot.from_docs([_drop_nulls(row) for row in table.to_pylist()])
+    watermark = metadata.get(b"watermark", b"").decode()
+    if watermark:
+        # Polled removals move the watermark past the newest doc still in the catalog
+        snapshot.watermark = max(filter(None, [snapshot.watermark, datetime.datetime.fromisoformat(watermark)]))
+    return snapshot
+
+
+class CatalogCache:
+    """Process-wide catalog snapshot shared by every session.
+
+    The first load (and any load after `invalidate`) reads the whole analysed
+    set. After that, once `ttl` seconds pass, only changes are fetched: from a
+    change stream when the server supports one, otherwise by polling for
+    documents with `updated_at` past the last watermark. Polling sees reports
+    that leave status "analysed" (their updated_at moves too) but not hard
+    deletes, so in polling mode the catalog is also fully reloaded every
+    `full_reload_interval` seconds, and whenever there is no watermark.
+
+    With `snapshot_path`, a new process starts from the catalog saved on disk
+    and reconciles it with a full Mongo load in a background thread; the
+    snapshot is re-saved after full loads and, at most every
+    `snapshot_interval` seconds, after refreshes that changed something.
+    """
+
+    def __init__(self, collection, ttl=300, page_size=1000, change_stream=True,
+                 snapshot_path=None, snapshot_interval=600, full_reload_interval=3600):
+        self.collection = collection
+        self.ttl = ttl
+        self.page_size = page_size
+        self.use_change_stream = change_stream
+        self.snapshot_path = snapshot_path
+        self.snapshot_interval = snapshot_interval
+        self.warm_started = False
+        self._warm_start_tried = snapshot_path is None
+        self._reconciler = None
+        self._last_save = 0.0
+        self.full_reload_interval = full_reload_interval
+        self._last_full_load = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.last_refresh_changes = 0
+        self._snapshot = None
+        self._stream = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self):
+        # The lock is held while loading so concurrent sessions that miss
+        # together wait for a single Mongo round-trip instead of each issuing one.
+        with self._lock:
+            if self._snapshot is not None and time.monotonic() < self._expires_at:
+                self.hits += 1
+                return self._snapshot
+            self.misses += 1
+            if self._snapshot is None and not self._warm_start_tried:
+                self._warm_start()
+            if self._snapshot is None:
+                self._full_load()
+            elif not self.reconciling:
+                self._refresh()
+            self._expires_at = time.monotonic() + self.ttl
+            return self._snapshot
+
+    def invalidate(self):
+        with self._lock:
+            self._close_stream()
+            self._snapshot = None
+            self._expires_at = 0.0
+
+    @property
+    def reconciling(self):
+        return self._reconciler is not None and self._reconciler.is_alive()
+
+    def _warm_start(self):
+        # Caller holds the lock
+        self._warm_start_tried = True
+        try:
+            snapshot = load_snapshot(self.snapshot_path)
+        except Exception:
+            # Missing or unreadable snapshot: fall back to a blocking full load
+            return
+        if snapshot is None:
+            return
+        self._snapshot = snapshot
+        self.warm_started = True
+        self._reconciler = threading.Thread(target=self._reconcile, name="catalog-reconcile", daemon=True)
+        self._reconciler.start()
+
+    def _reconcile(self):
+        # Full load without holding the lock; sessions keep the disk snapshot meanwhile
+        try:
+            self._open_stream()
+            snapshot = CatalogSnapshot.from_docs(load_catalog(self.collection, page_size=self.page_size))
+        except pymongo.errors.PyMongoError as e:
+            # Later refreshes poll from the disk snapshot's watermark instead
+            print(f"Catalog reconcile failed: {e}")
+            return
+        with self._lock:
+            self._snapshot = snapshot
+            self.last_refresh_changes = len(snapshot.by_id)
+            self._last_full_load = time.monotonic()
+            self._expires_at = time.monotonic() + self.ttl
+        self._save(snapshot)
+
+    def _full_load(self):
+        # Open the stream before reading so nothing written during the load is missed
+        self._open_stream()
+        docs = load_catalog(self.collection, page_size=self.page_size)
+        self._snapshot = CatalogSnapshot.from_docs(docs)
+        self._last_full_load = time.monotonic()
+        self._save_in_background(self._snapshot)
+
+    def _save(self, snapshot):
+        if not self.snapshot_path:
+            return
+        self._last_save = time.monotonic()
+        try:
+            save_snapshot(snapshot, self.snapshot_path)
+        except Exception as e:
+            # Docs Arrow can't type consistently; the app still works without a snapshot
+            print(f"Could not save catalog snapshot: {e}")
+
+    def _save_in_background(self, snapshot):
+        if self.snapshot_path:
+            threading.Thread(target=self._save, args=(snapshot,), name="catalog-snapshot", daemon=True).start()
+
+    def _refresh(self):
+        if self._stream is not None:
+            try:
+                changed, removed = self._drain_stream()
+                polled_watermark = None
+            except pymongo.errors.PyMongoError:
+                # Stream lost (e.g. resume token expired): start over from a full load
+                self._close_stream()
+                self._full_load()
+                return
+        elif (self._snapshot.watermark is None
+              or time.monotonic() - self._last_full_load > self.full_reload_interval):
+            # Nothing to poll from (no updated_at in the catalog), or time to catch hard deletes
+            self._full_load()
+            return
+        else:
+            changed, removed, polled_watermark = self._poll_updated()
+        self.refreshes += 1
+        self.last_refresh_changes = len(changed) + len(removed)
+        self._snapshot = self._snapshot.merged(changed, removed)
+        if polled_watermark is not None:
+            # Removed docs don't reach merged(); don't poll them again
+            self._snapshot.watermark = max(filter(None, [self._snapshot.watermark, polled_watermark]))
+        if self.last_refresh_changes and time.monotonic() - self._last_save > self.snapshot_interval:
+            self._save_in_background(self._snapshot)
+
+    def _open_stream(self):
+        if not self.use_change_stream or self._stream is not None:
+            return
+        pipeline = [
+            {"$match": {"operationType": {"$in": ["insert", "update", "replace", "delete"]}}},
+            {"$project": {
+                "operationType": 1,
+                "documentKey": 1,
+                "fullDocument._id": 1,
+                "fullDocument.status": 1,
+                **{f"fullDocument.{field}": 1 for field in CATALOG_PROJECTION},
+            }},
+        ]
+        try:
+            self._stream = self.collection.watch(pipeline, full_document="updateLookup")
+        except Exception:
+            # Standalone servers and test doubles have no change streams; poll instead
+            self._stream = None
+
+    def _close_stream(self):
+        if self._stream is not None:
+            try:
+                self._stream.close()
+            except pymongo.errors.PyMongoError:
+                pass
+            self._stream = None
+
+    def _drain_stream(self):
+        latest = {}
+        while True:
+            event = self._stream.try_next()
+            if event is None:
+                break
+            latest[event["documentKey"]["_id"]] = event
+        changed, removed = [], []
+        for pdf_id, event in latest.items():
+            doc = event.get("fullDocument")
+            if event["operationType"] == "delete" or not doc or doc.get("status") != "analysed":
+                # Pipeline churn on reports we never listed is not a change
+                if pdf_id in self._snapshot.by_id:
+                    removed.append(pdf_id)
+            else:
+                doc.pop("status", None)
+                # The $project above keeps fullDocument fields only; _id comes from the key
+                doc["_id"] = pdf_id
+                changed.append(doc)
+        return changed, removed
+
+    def _poll_updated(self):
+        # Everything touched since the watermark, whatever its status: reports
+        # that left "analysed" come back as removals
+        docs = load_catalog(
+            self.collection, query={"updated_at": {"$gt": self._snapshot.watermark}},
+            page_size=self.page_size, projection=dict(CATALOG_PROJECTION, status=1),
+        )
+        changed, removed = [], []
+        for doc in docs:
+            if doc.pop("status", None) == "analysed":
+                changed.append(doc)
+            elif doc["_id"] in self._snapshot.by_id:
+                removed.append(doc["_id"])
+        return changed, removed, _max_updated_at(docs)
+
+    @property
+    def mode(self):
+        return "change_stream" if self._stream is not None else "polling"
+
+    def stats(self):
+        snapshot = self._snapshot
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "last_refresh_changes": self.last_refresh_changes,
+            "mode": self.mode,
+            "reports": len(snapshot.by_id) if snapshot else 0,
+            "age_seconds": round(time.time() - snapshot.loaded_at, 1) if snapshot else None,
+            "ttl_seconds": self.ttl,
+            "warm_start": self.warm_started,
+            "reconciling": self.reconciling,
+            **(snapshot.memory_usage() if snapshot else {}),
+        }
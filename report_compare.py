@@ -0,0 +1,94 @@
+import re
+
+import pandas as pd
+
+
+SUMMARY_FIELDS = {
+    "Broker": "broker",
+    "Published": "published_date",
+    "Rating": "rating",
+    "Target price": "target_price",
+    "Current price": "current_price",
+    "Upside (%)": "upside_pct",
+    "Time horizon": "time_horizon",
+    "Valuation": "valuation_method",
+    "Price band": "price_band",
+    "Overall sentiment": "overall_sentiment",
+    "Company sentiment": "company_sentiment",
+    "Key risks": "key_risks",
+}
+
+
+_FISCAL_YEAR_RE = re.compile(r"^(FY|CY)\s*'?(\d{2}(?:\d{2})?)[A-Za-z]*$", re.IGNORECASE)
+
+
+def period_key(period):
+    # Brokers label the same year FY25, FY25A, FY26E, FY26e or FY26ii; compare them as one
+    match = _FISCAL_YEAR_RE.match(str(period).strip())
+    return f"{match.group(1).upper()}{match.group(2)[-2:]}" if match else period
+
+
+def _names_match(a, b):
+    a, b = str(a).lower(), str(b).lower()
+    return a in b or b in a
+
+
+def company_facts(facts, company, pdf_ids):
+    # One fact row per report: the row for this company when a report covers several
+    rows = facts[facts["pdf_id"].isin(pdf_ids)]
+    if rows.empty:
+        return rows
+    matches = rows["company"].map(lambda name: _names_match(name, company))
+    rows = rows.assign(_match=matches).sort_values("_match", ascending=False, kind="stable")
+    rows = rows.drop_duplicates("pdf_id").drop(columns="_match")
+    return rows.sort_values("published_date", ascending=False, na_position="last")
+
+
+def _report_labels(rows):
+    dates = rows["published_date"].dt.strftime("%Y-%m-%d").fillna("")
+    return (rows["broker"].astype(str) + " · " + dates + " · " + rows["pdf_id"]).tolist()
+
+
+def compare_summary(facts, company, pdf_ids):
+    """Side-by-side summary: one column per report, one row per field."""
+    rows = company_facts(facts, company, pdf_ids)
+    if rows.empty:
+        return pd.DataFrame()
+    table = rows[list(SUMMARY_FIELDS.values())].rename(columns={v: k for k, v in SUMMARY_FIELDS.items()})
+    table["Published"] = table["Published"].dt.strftime("%Y-%m-%d")
+    table.index = _report_labels(rows)
+    # Fields mix numbers, dates and text, so the transposed table is shown as text
+    return table.astype(object).where(table.notna(), "").astype(str).T
+
+
+def compare_kpis(kpis, facts, company, pdf_ids, period=None):
+    """KPI values for one period across reports (metric x report)."""
+    rows = company_facts(facts, company, pdf_ids)
+    selected = kpis[kpis["pdf_id"].isin(rows["pdf_id"])]
+    if selected.empty:
+        return pd.DataFrame(), []
+    selected = selected.assign(period=selected["period"].map(period_key))
+    periods = sorted(selected["period"].dropna().unique())
+    if period is None:
+        # Default to the period most reports have numbers for
+        period = selected.groupby("period")["pdf_id"].nunique().idxmax()
+    selected = selected[selected["period"] == period]
+    labels = dict(zip(rows["pdf_id"], _report_labels(rows)))
+    table = selected.pivot_table(index="metric", columns="pdf_id", values="value", aggfunc="first")
+    table = table.reindex(columns=[pdf_id for pdf_id in rows["pdf_id"] if pdf_id in table.columns])
+    table = table.rename(columns=labels)
+    table.columns.name = None
+    return table, periods
+
+
+def target_price_stats(facts, company, pdf_ids):
+    rows = company_facts(facts, company, pdf_ids)
+    targets = rows["target_price"].dropna()
+    return {
+        "reports": len(rows),
+        "with_target": len(targets),
+        "mean_target": round(targets.mean(), 2) if len(targets) else None,
+        "min_target": targets.min() if len(targets) else None,
+        "max_target": targets.max() if len(targets) else None,
+        "ratings": rows["rating"].value_counts().loc[lambda c: c > 0].to_dict(),
+    }
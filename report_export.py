@@ -0,0 +1,115 @@
+"""Bulk export of many reports at once: a ZIP of HTML files or a JSONL dump.
+
+Bodies are fetched on a thread pool with a bounded number in flight and
+written out as they arrive, so memory stays flat however many reports are
+exported; the archive itself goes to a file, not a buffer.
+"""
+import glob
+import os
+import tempfile
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from bson import json_util
+
+from report_renderer import REPORT_CSS, STYLESHEET_NAME
+
+EXPORT_FORMATS = {"zip": "application/zip", "jsonl": "application/x-ndjson"}
+JSONL_BATCH_SIZE = 100
+EXPORT_PREFIX = "report_export_"
+
+
+def _fetch_all(fetch, items, workers, progress=None):
+    # Yields (item, result) in completion order, at most workers * 2 in flight
+    total = len(items)
+    done_count = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = {}
+        items = iter(items)
+        while True:
+            for item in items:
+                pending[pool.submit(fetch, item)] = item
+                if len(pending) >= workers * 2:
+                    break
+            if not pending:
+                return
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                item = pending.pop(future)
+                yield item, future.result()
+                done_count += 1
+                if progress:
+                    progress(done_count, total)
+
+
+def _read_or_none(store, pdf_id):
+    return store.read_raw(pdf_id) if store.exists(pdf_id) else None
+
+
+def export_zip(pdf_ids, store, fileobj, workers=8, progress=None):
+    """Write one <pdf_id>_report.html per stored report (plus report.css) into a ZIP.
+
+    Returns the ids that had no stored report; they are listed in missing.txt.
+    """
+    missing = []
+    with zipfile.ZipFile(fileobj, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=6) as zf:
+        # Stored reports link the shared stylesheet; ship it next to them
+        zf.writestr(STYLESHEET_NAME, REPORT_CSS)
+        for pdf_id, data in _fetch_all(lambda i: _read_or_none(store, i), list(pdf_ids), workers, progress):
+            if data is None:
+                missing.append(pdf_id)
+            else:
+                zf.writestr(f"{pdf_id}_report.html", data)
+        if missing:
+            zf.writestr("missing.txt", "\n".join(missing) + "\n")
+    return missing
+
+
+def export_jsonl(pdf_ids, collection, fileobj, workers=4, progress=None):
+    """Write the analysis document of every report as one JSON line; returns ids not found."""
+    pdf_ids = list(pdf_ids)
+    batches = [pdf_ids[i:i + JSONL_BATCH_SIZE] for i in range(0, len(pdf_ids), JSONL_BATCH_SIZE)]
+    found = set()
+
+    def batch_progress(done, total):
+        if progress:
+            progress(min(done * JSONL_BATCH_SIZE, len(pdf_ids)), len(pdf_ids))
+
+    def fetch(batch):
+        return list(collection.find({"_id": {"$in": batch}}))
+
+    for _, docs in _fetch_all(fetch, batches, workers, batch_progress):
+        for doc in docs:
+            found.add(doc["_id"])
+            fileobj.write((json_util.dumps(doc) + "\n").encode("utf-8"))
+    return [pdf_id for pdf_id in pdf_ids if pdf_id not in found]
+
+
+def read_export(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def new_export_file(export_format):
+    # (fd, path) of a fresh archive in the temp dir; sweep_exports() removes old ones
+    return tempfile.mkstemp(prefix=EXPORT_PREFIX, suffix=f".{export_format}")
+
+
+def sweep_exports(max_age, directory=None):
+    """Delete export archives older than max_age seconds; returns how many were removed.
+
+    Archives outlive the sessions that made them (closed tabs, restarts), so
+    they are swept by age rather than tracked per session.
+    """
+    cutoff = time.time() - max_age
+    removed = 0
+    for path in glob.glob(os.path.join(directory or tempfile.gettempdir(), f"{EXPORT_PREFIX}*")):
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                removed += 1
+        except OSError:
+            # Already removed by another session's sweep
+            pass
+    return removed
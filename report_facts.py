@@ -0,0 +1,285 @@
+"""Structured facts (calls, targets, sentiment, KPIs) extracted from rendered reports.
+
+    python report_facts.py --html-dir html_files --out report_facts
+
+Facts are stored as Parquet (one row per report and company) next to a long
+KPI table, so screens like "all BUY calls on Swiggy in the last 90 days" are
+vectorised queries instead of opening reports one by one.
+"""
+import argparse
+import os
+import re
+import threading
+import time
+
+import pandas as pd
+
+import perf
+from report_parser import parse_report_html
+from report_store import HTML_DIR, scan_reports
+
+FACT_COLUMNS = [
+    "pdf_id", "company", "broker", "published_date", "title", "rating", "rating_type",
+    "target_price", "current_price", "upside_pct", "time_horizon", "valuation_method",
+    "price_band", "market_cap_post_issue", "overall_sentiment", "company_sentiment", "key_risks",
+    "source_version",
+]
+KPI_COLUMNS = ["pdf_id", "company", "period", "metric", "value", "value_num"]
+# Part of every stored source_version; bump when extraction output changes
+EXTRACTOR_VERSION = "2"
+
+RATINGS = ["STRONG BUY", "BUY", "ACCUMULATE", "ADD", "SUBSCRIBE", "HOLD", "NEUTRAL", "REDUCE", "SELL", "AVOID"]
+_RATING_RE = re.compile(r"\b(" + "|".join(RATINGS) + r")\b", re.IGNORECASE)
+_NUMBER_RE = re.compile(r"[-+]?\d[\d,]*(?:\.\d+)?")
+_COMPANY_SENTIMENT_RE = re.compile(r"^(.*\S)\s*\(([^()]+)\)$")
+# FY25, FY26E, 2025E, H1FY25, Q1 FY26, CY24A, FY26ii (a column footnote)
+_PERIOD_RE = re.compile(r"^(?:[HQ][1-4]\s*)?(?:FY|CY)?\s*'?\d{2}(?:\d{2})?[A-Za-z]{0,2}$", re.IGNORECASE)
+
+
+def parse_number(text):
+    match = _NUMBER_RE.search(text or "")
+    if not match:
+        return None
+    try:
+        return float(match.group().replace(",", ""))
+    except ValueError:
+        return None
+
+
+def normalise_rating(text):
+    match = _RATING_RE.search(text or "")
+    return match.group(1).upper() if match else None
+
+
+def _text(sections, heading):
+    section = sections.get(heading)
+    if not section:
+        return None
+    return " ".join(section["text"] + section["items"]) or None
+
+
+def _lines(sections, heading):
+    section = sections.get(heading)
+    if not section:
+        return None
+    return "\n".join(section["items"] + section["text"]) or None
+
+
+def _table_records(sections, heading):
+    section = sections.get(heading)
+    if not section or not section["tables"] or len(section["tables"][0]["rows"]) < 2:
+        return []
+    header, *rows = section["tables"][0]["rows"]
+    return [dict(zip(header, row)) for row in rows]
+
+
+def is_period(text):
+    return bool(_PERIOD_RE.match((text or "").strip()))
+
+
+def kpi_cells(sections):
+    # (period, metric, value) from the KPI table, which reports lay out either
+    # way round (periods down the first column or across the header) or long
+    section = sections.get("KPI Table")
+    if not section or not section["tables"] or len(section["tables"][0]["rows"]) < 2:
+        return
+    header, *rows = section["tables"][0]["rows"]
+    if {"Metric", "Value"} <= set(header):
+        metric_at, value_at = header.index("Metric"), header.index("Value")
+        period_at = next(i for i in range(len(header)) if i not in (metric_at, value_at))
+        for row in rows:
+            if len(row) == len(header):
+                yield row[period_at], row[metric_at], row[value_at]
+        return
+    periods_across = sum(map(is_period, header[1:])) > sum(is_period(row[0]) for row in rows if row)
+    for row in rows:
+        if not row:
+            continue
+        for label, value in zip(header[1:], row[1:]):
+            yield (label, row[0], value) if periods_across else (row[0], label, value)
+
+
+def extract_report_facts(pdf_id, html, source_version=None, catalog_doc=None):
+    report = parse_report_html(html)
+    sections = report["sections"]
+    catalog_doc = catalog_doc or {}
+    base = dict.fromkeys(FACT_COLUMNS)
+    base.update({
+        "pdf_id": pdf_id,
+        "broker": catalog_doc.get("metadata", {}).get("source") or report["source"],
+        "published_date": catalog_doc.get("published_date") or report["published_date"],
+        "title": catalog_doc.get("title") or report["title"],
+        "price_band": _text(sections, "Price Band"),
+        "market_cap_post_issue": _text(sections, "Market Cap Post Issue"),
+        "overall_sentiment": _text(sections, "Overall Sentiment"),
+        "key_risks": _lines(sections, "Key Risks") or _lines(sections, "Risks"),
+        "source_version": source_version,
+    })
+
+    recommendation = (_table_records(sections, "Recommendation Table") or [{}])[0]
+    if recommendation:
+        base.update({
+            "rating": normalise_rating(recommendation.get("Rating")),
+            "rating_type": recommendation.get("Rating Type"),
+            "target_price": parse_number(recommendation.get("Target Price")),
+            "current_price": parse_number(recommendation.get("Current Price")),
+            "upside_pct": parse_number(recommendation.get("Upside/Downside (%)")),
+            "time_horizon": recommendation.get("Time Horizon"),
+            "valuation_method": recommendation.get("Valuation Method"),
+        })
+    if base["rating"] is None:
+        # IPO notes state the call in prose ("rated 'AVOID'", "Subscribe at the cut-off")
+        base["rating"] = normalise_rating(_text(sections, "Analyst View") or _text(sections, "Recommendation Rationale"))
+
+    rows = []
+    for heading in ("Company Wise Detail", "Company Summaries"):
+        for name in sections.get(heading, {}).get("headings", []):
+            match = _COMPANY_SENTIMENT_RE.match(name)
+            if match:
+                rows.append(dict(base, company=match.group(1), company_sentiment=match.group(2)))
+    if not rows:
+        companies = catalog_doc.get("company_names") or [_text(sections, "Company Name")]
+        rows = [dict(base, company=company) for company in companies]
+
+    company = rows[0]["company"] if len(rows) == 1 else None
+    kpis = [
+        {"pdf_id": pdf_id, "company": company, "period": period,
+         "metric": metric, "value": value, "value_num": parse_number(value)}
+        for period, metric, value in kpi_cells(sections)
+    ]
+    return rows, kpis
+
+
+def _concat(frames, columns):
+    frames = [frame for frame in frames if len(frame)]
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(frames, ignore_index=True).reindex(columns=columns)
+
+
+def _typed(facts):
+    facts = facts.reindex(columns=FACT_COLUMNS)
+    facts["published_date"] = pd.to_datetime(facts["published_date"], errors="coerce")
+    for column in ("target_price", "current_price", "upside_pct"):
+        facts[column] = pd.to_numeric(facts[column], errors="coerce")
+    for column in ("broker", "rating", "rating_type", "overall_sentiment", "company_sentiment"):
+        facts[column] = facts[column].astype("category")
+    return facts
+
+
+class FactStore:
+    """Parquet-backed fact tables, rebuilt incrementally from html_files/.
+
+    Run `python report_facts.py` after rendering to extract offline; the app
+    only calls sync_in_background() to pick up stragglers.
+    """
+
+    def __init__(self, path="report_facts"):
+        self.path = path
+        self.facts_path = os.path.join(path, "facts.parquet")
+        self.kpis_path = os.path.join(path, "kpis.parquet")
+        self.facts = _typed(pd.DataFrame(columns=FACT_COLUMNS))
+        self.kpis = pd.DataFrame(columns=KPI_COLUMNS)
+        self.version = 0
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._syncer = None
+        self._last_sync = 0.0
+        if os.path.exists(self.facts_path):
+            facts = pd.read_parquet(self.facts_path)
+            # A store written with an older column set is rebuilt from scratch
+            if set(FACT_COLUMNS) <= set(facts.columns):
+                self.facts = _typed(facts)
+                self.kpis = pd.read_parquet(self.kpis_path)
+
+    def sync(self, html_dir=HTML_DIR, catalog_docs=None, min_interval=0):
+        # Re-extract only reports whose file changed; drop reports that disappeared
+        if time.monotonic() - self._last_sync < min_interval:
+            return 0
+        with self._lock:
+            self._last_sync = time.monotonic()
+            if not os.path.isdir(html_dir):
+                # Nothing rendered yet (or reports live elsewhere): keep what we have
+                return 0
+            seen = {
+                pdf_id: (path, f"{version}/{EXTRACTOR_VERSION}")
+                for pdf_id, (path, version) in scan_reports(html_dir).items()
+            }
+            known = dict(zip(self.facts["pdf_id"], self.facts["source_version"]))
+            changed = [pdf_id for pdf_id, (_, version) in seen.items() if known.get(pdf_id) != version]
+            stale = set(changed) | (set(known) - set(seen))
+            if not stale:
+                return 0
+            fact_rows, kpi_rows = [], []
+            for pdf_id in changed:
+                path, version = seen[pdf_id]
+                with open(path, "rb") as f:
+                    data = f.read()
+                perf.count("html_bytes_read", len(data))
+                html = data.decode("utf-8")
+                rows, kpis = extract_report_facts(pdf_id, html, version, (catalog_docs or {}).get(pdf_id))
+                fact_rows.extend(rows)
+                kpi_rows.extend(kpis)
+            self.facts = _typed(_concat([self.facts[~self.facts["pdf_id"].isin(stale)], pd.DataFrame(fact_rows)], FACT_COLUMNS))
+            self.kpis = _concat([self.kpis[~self.kpis["pdf_id"].isin(stale)], pd.DataFrame(kpi_rows)], KPI_COLUMNS)
+            self.save()
+            self.version += 1
+            return len(stale)
+
+    @property
+    def syncing(self):
+        return self._syncer is not None and self._syncer.is_alive()
+
+    def sync_in_background(self, html_dir=HTML_DIR, catalog_docs=None, min_interval=0):
+        # Extraction parses every changed report; sessions keep the current tables
+        # (and version) until it finishes. Returns whether a sync was started.
+        with self._start_lock:
+            if self.syncing or time.monotonic() - self._last_sync < min_interval:
+                return False
+            self._last_sync = time.monotonic()
+            self._syncer = threading.Thread(
+                target=self._sync_quietly, args=(html_dir, catalog_docs), name="facts-sync", daemon=True,
+            )
+            self._syncer.start()
+            return True
+
+    def _sync_quietly(self, html_dir, catalog_docs):
+        try:
+            self.sync(html_dir, catalog_docs)
+        except Exception as e:
+            print(f"Fact extraction failed: {e}")
+
+    def save(self):
+        os.makedirs(self.path, exist_ok=True)
+        for df, path in ((self.facts, self.facts_path), (self.kpis, self.kpis_path)):
+            tmp_path = path + ".tmp"
+            df.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, path)
+
+
+def query_calls(facts, company=None, ratings=(), brokers=(), days=None, today=None):
+    mask = pd.Series(True, index=facts.index)
+    if company:
+        mask &= facts["company"].str.contains(company, case=False, regex=False, na=False)
+    if ratings:
+        mask &= facts["rating"].isin([r.upper() for r in ratings])
+    if brokers:
+        mask &= facts["broker"].isin(brokers)
+    if days:
+        since = pd.Timestamp(today or pd.Timestamp.now().normalize()) - pd.Timedelta(days=days)
+        mask &= facts["published_date"] >= since
+    return facts[mask].sort_values("published_date", ascending=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--html-dir", default=HTML_DIR)
+    parser.add_argument("--out", default="report_facts")
+    args = parser.parse_args()
+    store = FactStore(args.out)
+    changed = store.sync(args.html_dir)
+    print(f"Updated {changed} reports; {len(store.facts)} fact rows, {len(store.kpis)} KPI rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+from html.parser import HTMLParser
+
+
+class _ReportHTMLParser(HTMLParser):
+    # Walks the flat structure every report in html_files/ shares:
+    # <h1>title</h1>, <p><b>Published Date:</b> ..</p>, <p><b>Source:</b> ..</p>,
+    # then one <h3> per section holding paragraphs, lists, <h4> titles and tables.
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.report = {"title": "", "published_date": None, "source": None, "sections": {}}
+        self.section = None
+        self.tag_text = None
+        self.capture_tag = None
+        self.table = None
+        self.row = None
+        self.table_title = None
+        self.depth_li = 0
+
+    def _new_section(self, heading):
+        self.section = {"text": [], "items": [], "headings": [], "tables": []}
+        self.report["sections"][heading] = self.section
+
+    def handle_starttag(self, tag, attrs):
+        if self.tag_text is None and (tag in ("h1", "h3", "h4", "p", "pre", "td", "th") or tag == "li"):
+            self.tag_text = []
+            self.capture_tag = tag
+        if tag == "li":
+            self.depth_li += 1
+        elif tag == "table":
+            self.table = []
+        elif tag == "tr" and self.table is not None:
+            self.row = []
+
+    def handle_endtag(self, tag):
+        if tag == "li":
+            self.depth_li -= 1
+        if tag == "tr" and self.row is not None:
+            self.table.append(self.row)
+            self.row = None
+            return
+        if tag == "table" and self.table is not None:
+            if self.section is not None:
+                self.section["tables"].append({"title": self.table_title, "rows": self.table})
+            self.table = None
+            self.table_title = None
+            return
+        if self.tag_text is None or tag != self.capture_tag or (tag == "li" and self.depth_li):
+            return
+        text = " ".join("".join(self.tag_text).split())
+        self.tag_text = None
+        self.capture_tag = None
+        if tag in ("td", "th"):
+            if self.row is not None:
+                self.row.append(text)
+            return
+        if tag == "h1":
+            self.report["title"] = text
+        elif tag == "h3":
+            self._new_section(text)
+        elif tag == "h4":
+            self.table_title = text
+            if self.section is not None:
+                self.section["headings"].append(text)
+        elif tag == "p" and self.section is None:
+            for label, key in (("Published Date:", "published_date"), ("Source:", "source")):
+                if text.startswith(label):
+                    self.report[key] = text[len(label):].strip()
+        elif self.section is not None and text and self.table is None:
+            if tag == "li":
+                self.section["items"].append(text)
+            else:
+                self.section["text"].append(text)
+
+    def handle_data(self, data):
+        if self.tag_text is not None:
+            self.tag_text.append(data)
+        elif self.section is not None and data.strip():
+            # Loose text, e.g. "<b>Summary:</b> ...<br>" in company details
+            self.section["text"].append(" ".join(data.split()))
+
+
+def parse_report_html(html):
+    """Split a rendered report into title/date/source and its <h3> sections.
+
+    Each section is {"text": [paragraphs], "items": [list items],
+    "headings": [<h4> titles], "tables": [{"title", "rows"}]}.
+    """
+    parser = _ReportHTMLParser()
+    parser.feed(html)
+    parser.close()
+    return parser.report
+
+
+def section_text(section):
+    parts = list(section["headings"]) + list(section["text"]) + list(section["items"])
+    for table in section["tables"]:
+        parts.extend(" ".join(row) for row in table["rows"])
+    return "\n".join(parts)
@@ -0,0 +1,198 @@
+import csv
+import re
+from functools import lru_cache
+from html import escape
+from io import StringIO
+
+
+# Preferred sectoral report field order
+FIELD_ORDER = [
+    "sector", "period_covered", "analysts", "executive_summary",
+    "overall_sentiment", "overall_sentiment_triggers", "sector_highlights",
+    "industry_metrics_tables", "charts_and_figures", "macro_trends",
+    "headwinds_tailwinds", "key_statistics", "top_companies", "weak_companies",
+    "company_wise_detail", "conclusion", "data_sources", "sector_specific"
+]
+
+
+STYLESHEET_NAME = "report.css"
+
+REPORT_CSS = """body,div,ul,li,p,h1,h2,h3,h4 { font-family: 'Segoe UI', 'Roboto', sans-serif; }
+.report-box { background: #f7fafd; border-radius: 16px; border: 1px solid #cde3f7; padding: 32px 24px; margin-bottom:24px; }
+h1 { color: #2261a8; }
+h2, h3 { color: #2674c2; margin-top: 1.6em;}
+h4 { color: #195280; margin-bottom: 0.5em;}
+ul { padding-left: 1.2em; }
+li { margin-bottom: 0.5em;}
+table { border-collapse: collapse; margin: 12px 0;}
+table, th, td { border: 1px solid #9ec6e7; }
+th, td { padding: 8px 12px; }
+.section { margin-bottom: 2em; }
+"""
+
+_HEAD = """<html>
+<head>
+<meta charset="UTF-8">
+<title>Sectoral Report</title>
+{style}
+</head>
+<body>
+<div class="report-box">"""
+
+_INLINE_HEAD = _HEAD.format(style=f"<style>\n{REPORT_CSS}</style>")
+
+
+def stylesheet_link(href=STYLESHEET_NAME):
+    return f'<link rel="stylesheet" href="{escape(href)}">'
+
+
+def inline_stylesheet(html, href=STYLESHEET_NAME):
+    # Reports written with a shared stylesheet link need the CSS inlined when
+    # embedded (e.g. components.html iframes) where the relative link can't resolve.
+    link = stylesheet_link(href)
+    if link not in html:
+        return html
+    return html.replace(link, f"<style>\n{REPORT_CSS}</style>", 1)
+
+
+_STYLE_BLOCK = re.compile(r"<style>(.*?)</style>", re.DOTALL)
+
+
+def share_stylesheet(html, href=STYLESHEET_NAME):
+    # Inverse of inline_stylesheet: an embedded copy of REPORT_CSS (however
+    # indented) becomes the shared link, so stored reports don't repeat it.
+    match = _STYLE_BLOCK.search(html)
+    if not match or match.group(1).split() != REPORT_CSS.split():
+        return html
+    return html[:match.start()] + stylesheet_link(href) + html[match.end():]
+
+
+def render_list(lst):
+    if not lst: return ""
+    return "<ul>" + "".join(f"<li>{escape(str(item))}</li>" for item in lst) + "</ul>"
+
+
+def _html_table(rows):
+    header, body = rows[0], rows[1:]
+    width = len(header)
+    out = ['<table border="1" class="dataframe"><thead><tr>']
+    out.extend(f"<th>{escape(cell)}</th>" for cell in header)
+    out.append("</tr></thead><tbody>")
+    for row in body:
+        out.append("<tr>")
+        out.extend(f"<td>{escape(cell)}</td>" for cell in row + [""] * (width - len(row)))
+        out.append("</tr>")
+    out.append("</tbody></table>")
+    return "".join(out)
+
+
+def render_table(table_data, description=""):
+    # Tables are a few rows of CSV, so the csv module is plenty (and far
+    # cheaper than a DataFrame round-trip); cells are kept as written.
+    rows = [row for row in csv.reader(StringIO(table_data)) if row]
+    if rows and all(len(row) <= len(rows[0]) for row in rows):
+        return f"<div><p>{escape(description)}</p>{_html_table(rows)}</div>"
+    # Fallback: show as pre
+    return f"<div><p>{escape(description)}</p><pre>{escape(table_data)}</pre></div>"
+
+
+def _metrics_tables(value):
+    for tbl in value:
+        yield f"<h4>{escape(tbl['title'])}</h4>"
+        yield render_table(tbl["table_data"], tbl.get("description", ""))
+
+
+def _charts(value):
+    yield "<ul>" + "".join(
+        f"<li><b>{escape(str(c['title']))}</b>: {escape(str(c['description']))}</li>" for c in value
+    ) + "</ul>"
+
+
+def _ranked_companies(value):
+    yield "<ul>"
+    for item in value:
+        yield (
+            f"<li><b>{escape(item['name'])}</b>: {escape(item['performance_summary'])}"
+            + (f"<br><em>Rationale:</em> {escape(item.get('rationale',''))}" if 'rationale' in item else "")
+            + "</li>"
+        )
+    yield "</ul>"
+
+
+def _company_details(value):
+    for comp in value:
+        yield f"<h4>{escape(comp['name'])} <span style='color:gray'>({escape(comp['sentiment'])})</span></h4>"
+        yield f"<b>Summary:</b> {escape(comp.get('brief_summary',''))}<br>"
+        if comp.get("sentiment_triggers"):
+            yield f"<b>Triggers:</b> {render_list(comp['sentiment_triggers'])}"
+        if comp.get("metrics"):
+            yield f"<b>Metrics:</b><br><pre>{escape(comp['metrics'])}</pre>"
+        yield f"<b>Outlook/Guidance:</b> {escape(comp.get('outlook_guidance',''))}<br>"
+
+
+def _plain_list(value):
+    yield render_list(value)
+
+
+def _mapping(value):
+    yield "<ul>"
+    for k, v in value.items():
+        if isinstance(v, list):
+            yield f"<li><b>{escape(k)}:</b> {render_list(v)}</li>"
+        else:
+            yield f"<li><b>{escape(k)}:</b> {escape(str(v))}</li>"
+    yield "</ul>"
+
+
+def _scalar(value):
+    yield f"<p>{escape(str(value))}</p>"
+
+
+# Renderers for list-valued fields with their own layout; any other list is a plain <ul>
+LIST_FIELD_RENDERERS = {
+    "industry_metrics_tables": _metrics_tables,
+    "charts_and_figures": _charts,
+    "top_companies": _ranked_companies,
+    "weak_companies": _ranked_companies,
+    "company_wise_detail": _company_details,
+}
+
+TYPE_RENDERERS = {list: _plain_list, dict: _mapping}
+
+
+@lru_cache(maxsize=None)
+def _heading(field):
+    return f"<h3>{field.replace('_',' ').title()}</h3>"
+
+
+def _field_renderer(field, value):
+    if isinstance(value, list):
+        return LIST_FIELD_RENDERERS.get(field, _plain_list)
+    return TYPE_RENDERERS.get(type(value), _mapping if isinstance(value, dict) else _scalar)
+
+
+def iter_sectoral_report(data, field_order, stylesheet=None):
+    """Yield the report HTML in chunks (for streaming or writing straight to disk).
+
+    With `stylesheet` set, the page links that shared stylesheet instead of
+    inlining the CSS block.
+    """
+    yield _INLINE_HEAD if stylesheet is None else _HEAD.format(style=stylesheet_link(stylesheet))
+    for field in field_order:
+        value = data.get(field)
+        if not value:
+            continue
+        yield _heading(field)
+        yield from _field_renderer(field, value)(value)
+    yield '</div></body></html>'
+
+
+def render_sectoral_report(data, field_order, stylesheet=None):
+    return "\n".join(iter_sectoral_report(data, field_order, stylesheet))
+
+
+def write_sectoral_report(data, field_order, f, stylesheet=None):
+    for i, chunk in enumerate(iter_sectoral_report(data, field_order, stylesheet)):
+        if i:
+            f.write("\n")
+        f.write(chunk)
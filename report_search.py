@@ -0,0 +1,237 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+import perf
+from report_parser import parse_report_html, section_text
+from report_store import HTML_DIR, scan_reports
+
+
+# Analysis fields (and their rendered headings) that are worth searching
+SEARCH_FIELDS = [
+    "executive_summary", "key_risks", "recommendation_rationale", "macro_trends",
+    "brief_summary", "summary", "analyst_view", "sector_highlights", "conclusion",
+    "key_growth_drivers", "headwinds_tailwinds", "company_wise_detail", "top_companies",
+    "weak_companies", "overall_sentiment_triggers", "business_overview", "industry_overview",
+]
+
+SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS reports_fts USING fts5(
+    pdf_id UNINDEXED, title, companies, body, tokenize = 'porter unicode61'
+);
+CREATE TABLE IF NOT EXISTS indexed_reports (
+    pdf_id TEXT PRIMARY KEY, origin TEXT NOT NULL, version TEXT NOT NULL, fts_rowid INTEGER NOT NULL
+);
+"""
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+# Scopes up to this many ids are matched in SQL; larger ones are intersected in Python
+SCOPE_TABLE_MAX = 5000
+SNIPPET_WORDS = 16
+
+
+def to_match_query(text):
+    # Quote every token so user input can't break FTS5 syntax; the last token
+    # is a prefix match so results show up while the user is still typing.
+    tokens = _TOKEN.findall(text)
+    if not tokens:
+        return None
+    quoted = [f'"{token}"' for token in tokens]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def highlight_pattern(text):
+    # Words starting with a query token, loosely stemmed to follow the porter tokenizer
+    stems = [token[:-2] if len(token) > 5 else token for token in _TOKEN.findall(text.lower())]
+    return re.compile(r"\b(?:" + "|".join(map(re.escape, stems)) + r")\w*", re.IGNORECASE)
+
+
+def make_snippet(body, highlight, words=SNIPPET_WORDS):
+    # ~words around the first highlighted term, terms in **bold**, like FTS5 snippet()
+    hit = highlight.search(body)
+    start = body.rfind("\n", 0, hit.start()) + 1 if hit else 0
+    if hit and hit.start() - start > 60:
+        start = body.rfind(" ", 0, hit.start() - 40) + 1
+    tokens = list(_TOKEN.finditer(body, start, start + words * 24))[:words]
+    if not tokens:
+        return ""
+    end = tokens[-1].end()
+    text = highlight.sub(lambda m: f"**{m.group()}**", body[tokens[0].start():end]).replace("\n", " ")
+    return ("…" if tokens[0].start() > 0 else "") + text + ("…" if end < len(body) else "")
+
+
+def _flatten(value):
+    if isinstance(value, dict):
+        return " ".join(f"{k} {_flatten(v)}" for k, v in value.items())
+    if isinstance(value, list):
+        return " ".join(_flatten(v) for v in value)
+    return "" if value is None else str(value)
+
+
+def doc_search_text(doc):
+    parts = [doc.get("metadata", {}).get("text_preview", "")]
+    for field in SEARCH_FIELDS:
+        if doc.get(field):
+            parts.append(f"{field.replace('_', ' ').title()}: {_flatten(doc[field])}")
+    return "\n".join(p for p in parts if p)
+
+
+class ReportSearchIndex:
+    """Local SQLite FTS5 index over report content with BM25 ranking.
+
+    Each report is stored with a version (file mtime/size, or the document's
+    updated_at), so re-syncing only rewrites reports that changed. Feed an
+    index from one origin (html_files/ or Mongo documents), not both.
+    """
+
+    def __init__(self, path="report_search.db"):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._syncer = None
+        self._last_sync = 0.0
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM indexed_reports").fetchone()[0]
+
+    def _versions(self, origin):
+        return dict(self._conn.execute("SELECT pdf_id, version FROM indexed_reports WHERE origin = ?", (origin,)))
+
+    def _upsert(self, pdf_id, origin, version, title, companies, body):
+        # Caller holds the lock and commits
+        self._delete(pdf_id)
+        cur = self._conn.execute(
+            "INSERT INTO reports_fts (pdf_id, title, companies, body) VALUES (?, ?, ?, ?)",
+            (pdf_id, title, companies, body),
+        )
+        self._conn.execute(
+            "INSERT INTO indexed_reports (pdf_id, origin, version, fts_rowid) VALUES (?, ?, ?, ?)",
+            (pdf_id, origin, version, cur.lastrowid),
+        )
+
+    def _delete(self, pdf_id):
+        row = self._conn.execute("SELECT fts_rowid FROM indexed_reports WHERE pdf_id = ?", (pdf_id,)).fetchone()
+        if row:
+            self._conn.execute("DELETE FROM reports_fts WHERE rowid = ?", (row[0],))
+            self._conn.execute("DELETE FROM indexed_reports WHERE pdf_id = ?", (pdf_id,))
+
+    def remove(self, pdf_ids):
+        with self._lock, self._conn:
+            for pdf_id in pdf_ids:
+                self._delete(pdf_id)
+
+    def index_docs(self, docs):
+        # Analysed Mongo documents; versioned by updated_at when present
+        count = 0
+        with self._lock, self._conn:
+            versions = self._versions("mongo")
+            for doc in docs:
+                version = str(doc.get("updated_at") or doc.get("published_date") or "")
+                if versions.get(doc["_id"]) == version and version:
+                    continue
+                self._upsert(
+                    doc["_id"], "mongo", version, doc.get("title", ""),
+                    ", ".join(doc.get("company_names", [])), doc_search_text(doc),
+                )
+                count += 1
+        return count
+
+    def sync_html_dir(self, html_dir=HTML_DIR, min_interval=0):
+        # Index new/changed reports in html_files/ and drop deleted ones
+        if time.monotonic() - self._last_sync < min_interval:
+            return 0
+        self._last_sync = time.monotonic()
+        if not os.path.isdir(html_dir):
+            # Nothing rendered yet: keep the index as it is rather than dropping every html entry
+            return 0
+        seen = scan_reports(html_dir)
+        with self._lock:
+            versions = self._versions("html")
+        changed = [(pdf_id, path, version) for pdf_id, (path, version) in seen.items() if versions.get(pdf_id) != version]
+        removed = [pdf_id for pdf_id in versions if pdf_id not in seen]
+        for pdf_id, path, version in changed:
+            with open(path, "rb") as f:
+                data = f.read()
+            perf.count("html_bytes_read", len(data))
+            report = parse_report_html(data.decode("utf-8"))
+            sections = report["sections"]
+            companies = " ".join(sections["Company Name"]["text"]) if "Company Name" in sections else ""
+            body = "\n".join(f"{heading}: {section_text(section)}" for heading, section in sections.items())
+            with self._lock, self._conn:
+                self._upsert(pdf_id, "html", version, report["title"], companies, body)
+        if removed:
+            self.remove(removed)
+        return len(changed) + len(removed)
+
+    @property
+    def syncing(self):
+        return self._syncer is not None and self._syncer.is_alive()
+
+    def sync_in_background(self, html_dir=HTML_DIR, min_interval=0):
+        # Searches keep using the current index while changed reports are parsed
+        with self._start_lock:
+            if self.syncing or time.monotonic() - self._last_sync < min_interval:
+                return False
+            self._last_sync = time.monotonic()
+            self._syncer = threading.Thread(
+                target=self._sync_quietly, args=(html_dir,), name="search-sync", daemon=True,
+            )
+            self._syncer.start()
+            return True
+
+    def _sync_quietly(self, html_dir):
+        try:
+            self.sync_html_dir(html_dir)
+        except Exception as e:
+            print(f"Search index sync failed: {e}")
+
+    def search(self, text, limit=50, pdf_ids=None):
+        # pdf_ids scopes the ranking to those reports (e.g. the filtered catalog),
+        # so the top `limit` hits are taken after filtering, not before.
+        match = to_match_query(text)
+        if match is None:
+            return []
+        ranked = """
+            SELECT f.rowid, f.pdf_id, f.title, bm25(reports_fts, 0.0, 10.0, 5.0, 1.0) AS score
+            FROM {source} WHERE reports_fts MATCH ? ORDER BY score LIMIT ?
+        """
+        with self._lock:
+            if pdf_ids is None:
+                rows = self._conn.execute(ranked.format(source="reports_fts f"), (match, limit)).fetchall()
+            elif len(pdf_ids) <= SCOPE_TABLE_MAX:
+                # Driving the match from the scope's rowids only scores those reports
+                self._conn.execute("CREATE TEMP TABLE IF NOT EXISTS search_scope (fts_rowid INTEGER PRIMARY KEY)")
+                self._conn.execute("DELETE FROM temp.search_scope")
+                self._conn.execute(
+                    "INSERT INTO temp.search_scope SELECT fts_rowid FROM indexed_reports "
+                    "WHERE pdf_id IN (SELECT value FROM json_each(?))",
+                    (json.dumps(list(pdf_ids)),),
+                )
+                source = "temp.search_scope s JOIN reports_fts f ON f.rowid = s.fts_rowid"
+                rows = self._conn.execute(ranked.format(source=source), (match, limit)).fetchall()
+            else:
+                # Loading a large scope costs more than ranking extra rows and dropping
+                # the ones outside it; over-fetch by how much of the index it leaves out
+                wanted = pdf_ids if isinstance(pdf_ids, (set, frozenset, dict)) else set(pdf_ids)
+                indexed = self._conn.execute("SELECT COUNT(*) FROM indexed_reports").fetchone()[0]
+                fetch = limit * max(2, 2 * indexed // len(wanted))
+                rows = self._conn.execute(ranked.format(source="reports_fts f"), (match, fetch)).fetchall()
+                rows = [row for row in rows if row[1] in wanted][:limit]
+            # Snippets come from the bodies of the hits only: snippet() in the ranked
+            # query would be evaluated for every match before the LIMIT applies
+            bodies = dict(self._conn.execute(
+                "SELECT rowid, body FROM reports_fts WHERE rowid IN (SELECT value FROM json_each(?))",
+                (json.dumps([row[0] for row in rows]),),
+            ))
+        highlight = highlight_pattern(text)
+        return [
+            {"pdf_id": r[1], "title": r[2], "snippet": make_snippet(bodies.get(r[0], ""), highlight), "score": -r[3]}
+            for r in rows
+        ]
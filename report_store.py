@@ -0,0 +1,375 @@
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import partial
+
+import perf
+from report_renderer import inline_stylesheet, share_stylesheet
+
+
+HTML_DIR = "html_files"
+
+
+class ReportCache:
+    """Bounded LRU of report bodies, shared by every session in the process.
+
+    Files are keyed by (path, mtime, size) and stored blobs by their digest,
+    so a regenerated report gets a new key and is re-read; the stale entry
+    simply ages out.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.resident_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _key(self, path):
+        st = os.stat(path)
+        return (path, st.st_mtime_ns, st.st_size)
+
+    def get_bytes(self, path):
+        return self._get(self._key(path), partial(_read_file, path))["data"]
+
+    def get_text(self, path):
+        return self._text(self._get(self._key(path), partial(_read_file, path)))
+
+    def get_blob_bytes(self, digest, load):
+        # Content-addressed blobs never change, so the digest alone is the key
+        return self._get(("blob", digest), load)["data"]
+
+    def get_blob_text(self, digest, load):
+        return self._text(self._get(("blob", digest), load))
+
+    def _text(self, entry):
+        if entry["text"] is None:
+            text = entry["data"].decode("utf-8")
+            with self._lock:
+                if entry["text"] is None:
+                    entry["text"] = text
+                    if self._entries.get(entry["key"]) is entry:
+                        self._resize(entry, len(entry["data"]) + len(text))
+        return entry["text"]
+
+    def _get(self, key, load):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+        data = load()
+        entry = {"key": key, "data": data, "text": None, "size": 0}
+        with self._lock:
+            # Another session may have loaded the same report meanwhile
+            if key in self._entries:
+                return self._entries[key]
+            self._entries[key] = entry
+            self._resize(entry, len(data))
+        return entry
+
+    def _resize(self, entry, size):
+        # Caller holds the lock
+        self.resident_bytes += size - entry["size"]
+        entry["size"] = size
+        while self.resident_bytes > self.max_bytes and len(self._entries) > 1:
+            _, evicted = self._entries.popitem(last=False)
+            self.resident_bytes -= evicted["size"]
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.resident_bytes = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "resident_bytes": self.resident_bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+
+def _read_file(path):
+    with perf.timer("html_read"), open(path, "rb") as f:
+        data = f.read()
+    perf.count("html_bytes_read", len(data))
+    return data
+
+
+report_cache = ReportCache()
+
+
+def report_path(pdf_id, html_dir=HTML_DIR):
+    return os.path.join(html_dir, f"{pdf_id}_report.html")
+
+
+def scan_reports(html_dir=HTML_DIR):
+    # pdf_id -> (path, version) for every report file; version changes when the file does
+    reports = {}
+    for entry in os.scandir(html_dir):
+        if entry.name.endswith("_report.html"):
+            st = entry.stat()
+            reports[entry.name[:-len("_report.html")]] = (entry.path, f"{st.st_mtime_ns}:{st.st_size}")
+    return reports
+
+
+def report_exists(pdf_id, html_dir=HTML_DIR):
+    return os.path.exists(report_path(pdf_id, html_dir))
+
+
+def read_report_bytes(pdf_id, html_dir=HTML_DIR):
+    data = report_cache.get_bytes(report_path(pdf_id, html_dir))
+    if b'rel="stylesheet"' in data:
+        # Standalone downloads can't follow the relative stylesheet link
+        data = inline_stylesheet(data.decode("utf-8")).encode("utf-8")
+    return data
+
+
+def read_report(pdf_id, html_dir=HTML_DIR):
+    return inline_stylesheet(report_cache.get_text(report_path(pdf_id, html_dir)))
+
+
+class BlobStore:
+    """Deduplicated, gzip-compressed report bodies in content-addressed shards.
+
+    Layout: <path>/blobs/<2 hex>/<sha256>.html.gz plus <path>/manifest.json
+    mapping pdf_id -> {"blob", "size", "stored", "source"}. Reports are stored
+    with the shared stylesheet link instead of the embedded CSS block, and
+    identical bodies share one blob. Lookups are manifest (dict) lookups.
+    """
+
+    def __init__(self, path="report_blobs", compresslevel=6):
+        self.path = path
+        self.compresslevel = compresslevel
+        self.manifest_path = os.path.join(path, "manifest.json")
+        self.reports = {}
+        self._manifest_mtime = None
+        self._lock = threading.Lock()
+        self._import_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._importer = None
+        self._last_import = 0.0
+        self.reload()
+
+    def reload(self):
+        # Picks up manifests written by another process (e.g. render_reports --store)
+        try:
+            mtime = os.stat(self.manifest_path).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime == self._manifest_mtime:
+            return
+        with open(self.manifest_path, encoding="utf-8") as f:
+            reports = json.load(f)
+        with self._lock:
+            self.reports = reports
+            self._manifest_mtime = mtime
+
+    def save(self):
+        os.makedirs(self.path, exist_ok=True)
+        # Unique per writer: the app's importer and the CLIs may save at the same time
+        tmp_path = f"{self.manifest_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with self._lock:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.reports, f, separators=(",", ":"), sort_keys=True)
+            os.replace(tmp_path, self.manifest_path)
+            self._manifest_mtime = os.stat(self.manifest_path).st_mtime_ns
+
+    def blob_path(self, digest):
+        return os.path.join(self.path, "blobs", digest[:2], f"{digest}.html.gz")
+
+    def __contains__(self, pdf_id):
+        return pdf_id in self.reports
+
+    def __len__(self):
+        return len(self.reports)
+
+    def exists(self, pdf_id):
+        return pdf_id in self.reports
+
+    def digest(self, pdf_id):
+        # Blob digest doubles as a strong ETag / version for the report body
+        return self.reports[pdf_id]["blob"]
+
+    def put(self, pdf_id, html, source=None, save=True):
+        data = share_stylesheet(html if isinstance(html, str) else html.decode("utf-8")).encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.blob_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                # mtime=0 keeps the compressed bytes reproducible for a given body
+                f.write(gzip.compress(data, self.compresslevel, mtime=0))
+            os.replace(tmp_path, path)
+        with self._lock:
+            self.reports[pdf_id] = {
+                "blob": digest, "size": len(data), "stored": os.path.getsize(path), "source": source,
+            }
+        if save:
+            self.save()
+        return digest
+
+    def import_html_dir(self, html_dir=HTML_DIR, min_interval=0):
+        # Store new/changed files from a flat report directory (the renderer's output)
+        with self._import_lock:
+            if time.monotonic() - self._last_import < min_interval:
+                return 0
+            self._last_import = time.monotonic()
+            self.reload()
+            if not os.path.isdir(html_dir):
+                return 0
+            changed = [
+                (pdf_id, path, version) for pdf_id, (path, version) in scan_reports(html_dir).items()
+                if self.reports.get(pdf_id, {}).get("source") != version
+            ]
+            for pdf_id, path, version in changed:
+                self.put(pdf_id, _read_file(path), source=version, save=False)
+            if changed:
+                self.save()
+            return len(changed)
+
+    @property
+    def importing(self):
+        return self._importer is not None and self._importer.is_alive()
+
+    def import_in_background(self, html_dir=HTML_DIR, min_interval=0):
+        # For deployments that don't run `render_reports --store` or this module's
+        # CLI; readers keep serving the current manifest meanwhile.
+        with self._start_lock:
+            if self.importing or time.monotonic() - self._last_import < min_interval:
+                return False
+            self._last_import = time.monotonic()
+            self._importer = threading.Thread(
+                target=self._import_quietly, args=(html_dir,), name="blob-import", daemon=True,
+            )
+            self._importer.start()
+            return True
+
+    def _import_quietly(self, html_dir):
+        try:
+            self.import_html_dir(html_dir)
+        except Exception as e:
+            print(f"Report import failed: {e}")
+
+    def compressed(self, pdf_id):
+        # Precompressed body for clients that accept gzip; no decompression on our side
+        return _read_file(self.blob_path(self.digest(pdf_id)))
+
+    def open(self, pdf_id):
+        # Streaming, decompressing reader over the stored body
+        return gzip.open(self.blob_path(self.digest(pdf_id)), "rb")
+
+    def _load(self, digest):
+        return gzip.decompress(_read_file(self.blob_path(digest)))
+
+    def read_raw(self, pdf_id):
+        # Uncached, for bulk reads that would otherwise flush the shared LRU
+        return self._load(self.digest(pdf_id))
+
+    def read_bytes(self, pdf_id):
+        digest = self.digest(pdf_id)
+        return report_cache.get_blob_bytes(digest, partial(self._load, digest))
+
+    def read_report(self, pdf_id):
+        digest = self.digest(pdf_id)
+        return inline_stylesheet(report_cache.get_blob_text(digest, partial(self._load, digest)))
+
+    def read_report_bytes(self, pdf_id):
+        return self.read_report(pdf_id).encode("utf-8")
+
+    def gc(self):
+        # Delete blobs no report points at any more
+        with self._lock:
+            referenced = {entry["blob"] for entry in self.reports.values()}
+        removed = 0
+        blobs_dir = os.path.join(self.path, "blobs")
+        if not os.path.isdir(blobs_dir):
+            return 0
+        for shard in os.scandir(blobs_dir):
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith(".html.gz") and entry.name[:-len(".html.gz")] not in referenced:
+                    os.remove(entry.path)
+                    removed += 1
+        return removed
+
+    def stats(self):
+        # A background import may be adding entries; work from a copy
+        with self._lock:
+            reports = dict(self.reports)
+        blobs = {}
+        for entry in reports.values():
+            blobs[entry["blob"]] = entry
+        raw = sum(entry["size"] for entry in reports.values())
+        stored = sum(entry["stored"] for entry in blobs.values())
+        return {
+            "reports": len(reports),
+            "blobs": len(blobs),
+            "raw_bytes": raw,
+            "stored_bytes": stored,
+            "ratio": round(raw / stored, 2) if stored else None,
+        }
+
+
+class HtmlDirStore:
+    """The flat html_files/ layout behind the same interface as BlobStore."""
+
+    def __init__(self, html_dir=HTML_DIR):
+        self.html_dir = html_dir
+
+    def exists(self, pdf_id):
+        return report_exists(pdf_id, self.html_dir)
+
+    def digest(self, pdf_id):
+        st = os.stat(report_path(pdf_id, self.html_dir))
+        return f"{st.st_mtime_ns:x}-{st.st_size:x}"
+
+    def read_raw(self, pdf_id):
+        return _read_file(report_path(pdf_id, self.html_dir))
+
+    def read_bytes(self, pdf_id):
+        return report_cache.get_bytes(report_path(pdf_id, self.html_dir))
+
+    def read_report(self, pdf_id):
+        return read_report(pdf_id, self.html_dir)
+
+    def read_report_bytes(self, pdf_id):
+        return read_report_bytes(pdf_id, self.html_dir)
+
+    def stats(self):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import rendered reports into a compressed blob store")
+    parser.add_argument("--html-dir", default=HTML_DIR)
+    parser.add_argument("--store", default="report_blobs")
+    parser.add_argument("--gc", action="store_true", help="also delete unreferenced blobs")
+    args = parser.parse_args()
+    store = BlobStore(args.store)
+    changed = store.import_html_dir(args.html_dir)
+    removed = store.gc() if args.gc else 0
+    stats = store.stats()
+    print(
+        f"Imported {changed} reports, removed {removed} blobs; {stats['reports']} reports in "
+        f"{stats['blobs']} blobs, {stats['raw_bytes']} -> {stats['stored_bytes']} bytes"
+    )
+
+
+if __name__ == "__main__":
+    main()
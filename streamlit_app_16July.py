@@ -1,12 +1,42 @@
 import os
+from functools import partial
 import streamlit as st
 import pymongo
 from pymongo import MongoClient
+from pymongo.errors import DuplicateKeyError, PyMongoError
 from datetime import datetime
-import pandas as pd
-from html import escape
-from io import StringIO
-import streamlit.components.v1 as components
+import perf
+from passwords import hash_password, needs_rehash, verify_password
+# pandas, numpy, pyarrow and the report modules are imported once a user is
+# logged in (see below), so the login form paints without waiting on them.
+
+
+AUTH_CACHE_TTL_SECONDS = 300
+
+
+@st.cache_data(ttl=AUTH_CACHE_TTL_SECONDS, show_spinner=False)
+def load_allowed_emails(_allowed_users_mails_collection):
+    doc = _allowed_users_mails_collection.find_one({}, {"_id": 0, "emails": 1}) or {}
+    return frozenset(email.lower() for email in doc.get("emails", []))
+
+
+@st.cache_resource
+def ensure_user_indexes(_users_collection):
+    # Unique username index: indexed login lookups and race-free registration.
+    # Errors propagate so a failed build isn't cached for good.
+    _users_collection.create_index("username", unique=True)
+
+
+@st.cache_data(ttl=AUTH_CACHE_TTL_SECONDS, show_spinner=False)
+def has_unique_usernames(_users_collection):
+    # A failed build (e.g. existing duplicate usernames) is retried once per TTL,
+    # not on every login submit
+    try:
+        ensure_user_indexes(_users_collection)
+        return True
+    except PyMongoError as e:
+        print(f"Could not create unique Users.username index: {e}")
+        return False
 
 
 class UserAuthenticator:
@@ -26,21 +56,27 @@ class UserAuthenticator:
             submit_button = st.form_submit_button("Register")
 
             if submit_button:
-                allowed_emails_list = (self.allowed_users_mails_collection.find_one({}, {"_id": 0, "emails": 1}) or {}).get("emails", [])
+                unique_usernames = has_unique_usernames(self.users_collection)
+                allowed_emails = load_allowed_emails(self.allowed_users_mails_collection)
                 if username and password and password == confirm_password and email and mobile_no:
-                    if email.lower() in allowed_emails_list:
-                        if self.users_collection.find_one({"username": username}):
+                    if email.lower() in allowed_emails:
+                        if not unique_usernames and self.users_collection.find_one({"username": username}, {"_id": 1}):
+                            # Without the index only this check guards against duplicates
                             st.error("Username already exists. Please choose another one.")
-                        else:
+                            return
+                        try:
                             self.users_collection.insert_one({
                                 "username": username,
-                                "password": password,
+                                "password": hash_password(password),
                                 "email": email,
                                 "mobile_no": mobile_no
                             })
+                        except DuplicateKeyError:
+                            st.error("Username already exists. Please choose another one.")
+                        else:
                             st.session_state.logged_in = True
                             st.session_state.username = username
-                            st.session_state.purpose = (self.users_collection.find_one({"username": username}, {"_id": 0, "purpose": 1}) or {}).get("purpose", "")
+                            st.session_state.purpose = ""
                             st.success(f"Registration successful for {username}!")
                             st.rerun()
                     else:
@@ -58,11 +94,17 @@ class UserAuthenticator:
             submit_button = st.form_submit_button("Login")
 
             if submit_button:
-                user = self.users_collection.find_one({"username": username})
-                if user and password and user["password"] == password:
+                has_unique_usernames(self.users_collection)
+                user = self.users_collection.find_one({"username": username}, {"_id": 0, "password": 1, "purpose": 1})
+                if user and verify_password(password, user.get("password")):
+                    if needs_rehash(user["password"]):
+                        # Transparently migrates plaintext (or weaker) records on next login
+                        self.users_collection.update_one(
+                            {"username": username}, {"$set": {"password": hash_password(password)}}
+                        )
                     st.session_state.logged_in = True
                     st.session_state.username = username
-                    st.session_state.purpose = (self.users_collection.find_one({"username": username}, {"_id": 0, "purpose": 1}) or {}).get("purpose", None)
+                    st.session_state.purpose = user.get("purpose")
                     st.success(f"Login successful for {username}!")
                     st.rerun()
                 else:
@@ -101,205 +143,385 @@ def local_file_url(pdf_id):
     return "file:///" + html_path.replace("\\", "/")
 
 
-def render_list(lst):
-    if not lst: return ""
-    return "<ul>" + "".join(f"<li>{escape(str(item))}</li>" for item in lst) + "</ul>"
+# Setup MongoDB: one pooled client and one catalog cache per server process
+MONGO_URI = st.secrets['mongodb']['uri']
+CATALOG_TTL_SECONDS = st.secrets.get("catalog", {}).get("ttl_seconds", 300)
+SERVER_SIDE_FILTERS = st.secrets.get("catalog", {}).get("server_side_filters", False)
+FACTS_PATH = st.secrets.get("facts", {}).get("path", "report_facts")
+SEARCH_DB_PATH = st.secrets.get("search", {}).get("db_path", "report_search.db")
+REPORT_CACHE_MAX_BYTES = st.secrets.get("report_cache", {}).get("max_mb", 64) * 1024 * 1024
+CATALOG_SNAPSHOT_PATH = st.secrets.get("catalog", {}).get("snapshot_path", "catalog_snapshot.parquet")
+REPORT_BACKEND = st.secrets.get("storage", {}).get("backend", "blobs")
+BLOB_STORE_PATH = st.secrets.get("storage", {}).get("blob_path", "report_blobs")
+EXPORT_MAX_REPORTS = st.secrets.get("export", {}).get("max_reports", 2000)
+EXPORT_TTL_SECONDS = st.secrets.get("export", {}).get("ttl_seconds", 3600)
+PERF_LOG = st.secrets.get("perf", {}).get("log", True)
+PERF_PANEL_PURPOSES = st.secrets.get("perf", {}).get("panel_purposes", ["admin"])
 
-def render_table(table_data, description=""):
-    # Assume CSV for simplicity
-    
-    try:
-        df = pd.read_csv(StringIO(table_data))
-        html_table = df.to_html(index=False, border=1)
-        return f"<div><p>{escape(description)}</p>{html_table}</div>"
-    except Exception:
-        # Fallback: show as pre
-        return f"<div><p>{escape(description)}</p><pre>{escape(table_data)}</pre></div>"
-
-
-def render_sectoral_report(data, field_order):
-    html = ["""
-    <html>
-    <head>
-    <meta charset="UTF-8">
-    <title>Sectoral Report</title>
-    <style>
-    body,div,ul,li,p,h1,h2,h3,h4 { font-family: 'Segoe UI', 'Roboto', sans-serif; }
-    .report-box { background: #f7fafd; border-radius: 16px; border: 1px solid #cde3f7; padding: 32px 24px; margin-bottom:24px; }
-    h1 { color: #2261a8; }
-    h2, h3 { color: #2674c2; margin-top: 1.6em;}
-    h4 { color: #195280; margin-bottom: 0.5em;}
-    ul { padding-left: 1.2em; }
-    li { margin-bottom: 0.5em;}
-    table { border-collapse: collapse; margin: 12px 0;}
-    table, th, td { border: 1px solid #9ec6e7; }
-    th, td { padding: 8px 12px; }
-    .section { margin-bottom: 2em; }
-    </style>
-    </head>
-    <body>
-    <div class="report-box">
-    """]
-    for field in field_order:
-        value = data.get(field)
-        if not value:
-            continue
-        html.append(f"<h3>{field.replace('_',' ').title()}</h3>")
-        if isinstance(value, list):
-            if field == "industry_metrics_tables":
-                for tbl in value:
-                    html.append(f"<h4>{escape(tbl['title'])}</h4>")
-                    html.append(render_table(tbl["table_data"], tbl.get("description","")))
-            elif field == "charts_and_figures":
-                html.append(render_list([f"<b>{c['title']}</b>: {c['description']}" for c in value]))
-            elif field in ["top_companies", "weak_companies"]:
-                html.append("<ul>")
-                for item in value:
-                    html.append(
-                        f"<li><b>{escape(item['name'])}</b>: {escape(item['performance_summary'])}"
-                        + (f"<br><em>Rationale:</em> {escape(item.get('rationale',''))}" if 'rationale' in item else "")
-                        + "</li>")
-                html.append("</ul>")
-            elif field == "company_wise_detail":
-                for comp in value:
-                    html.append(f"<h4>{escape(comp['name'])} <span style='color:gray'>({escape(comp['sentiment'])})</span></h4>")
-                    html.append(f"<b>Summary:</b> {escape(comp.get('brief_summary',''))}<br>")
-                    if comp.get("sentiment_triggers"):
-                        html.append(f"<b>Triggers:</b> {render_list(comp['sentiment_triggers'])}")
-                    if comp.get("metrics"):
-                        html.append(f"<b>Metrics:</b><br><pre>{escape(comp['metrics'])}</pre>")
-                    html.append(f"<b>Outlook/Guidance:</b> {escape(comp.get('outlook_guidance',''))}<br>")
-            elif field == "analysts":
-                html.append(render_list(value))
-            else:
-                html.append(render_list(value))
-        elif isinstance(value, dict):
-            html.append("<ul>")
-            for k, v in value.items():
-                if isinstance(v, list):
-                    html.append(f"<li><b>{escape(k)}:</b> {render_list(v)}</li>")
-                else:
-                    html.append(f"<li><b>{escape(k)}:</b> {escape(str(v))}</li>")
-            html.append("</ul>")
-        else:
-            html.append(f"<p>{escape(str(value))}</p>")
-    html.append('</div></body></html>')
-    return "\n".join(html)
 
+@st.cache_resource
+def get_mongo_client():
+    return MongoClient(MONGO_URI)
 
 
-# Setup MongoDB
-MONGO_URI = st.secrets['mongodb']['uri']
-mongo_client = MongoClient(MONGO_URI)
+@st.cache_resource
+def ensure_catalog_indexes():
+    # Once per process; backs both the server-side filters and the catalog cache
+    missing = ensure_indexes(collection)
+    if missing:
+        print(f"Missing catalog indexes (create them as a DB admin): {missing}")
+    return missing
+
+
+@st.cache_resource
+def get_catalog_cache():
+    # Warm-starts from the on-disk snapshot and reconciles with Mongo in the background
+    return CatalogCache(collection, ttl=CATALOG_TTL_SECONDS, snapshot_path=CATALOG_SNAPSHOT_PATH)
+
+
+@st.cache_resource
+def get_search_index():
+    return ReportSearchIndex(SEARCH_DB_PATH)
+
+
+@st.cache_resource
+def get_report_store():
+    # Compressed blob store fed from html_files/ (render output), or the flat files as-is
+    if REPORT_BACKEND == "blobs":
+        return BlobStore(BLOB_STORE_PATH)
+    return HtmlDirStore()
+
+
+@st.cache_resource
+def get_fact_store():
+    return FactStore(FACTS_PATH)
+
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def company_comparison(company, pdf_ids, facts_version):
+    # Keyed by (company, report set, fact store version) so repeat views are instant
+    store = get_fact_store()
+    return (
+        compare_summary(store.facts, company, list(pdf_ids)),
+        target_price_stats(store.facts, company, list(pdf_ids)),
+    )
+
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def company_kpi_comparison(company, pdf_ids, facts_version, period):
+    store = get_fact_store()
+    return compare_kpis(store.kpis, store.facts, company, list(pdf_ids), period)
+
+
+@st.cache_data(ttl=CATALOG_TTL_SECONDS, show_spinner=False)
+def server_company_report_ids(company):
+    query = build_filter_query(companies=[company])
+    return tuple(sorted(doc["_id"] for doc in load_catalog(collection, query=query, projection={"_id": 1})))
+
+
+def company_report_ids(company):
+    if server_side:
+        return server_company_report_ids(company)
+    return tuple(sorted(catalog.ids_for("company", [company])))
+
+
+@st.cache_data(ttl=CATALOG_TTL_SECONDS, show_spinner=False)
+def get_filter_options():
+    return distinct_options(collection)
+
+
+@st.cache_data(ttl=CATALOG_TTL_SECONDS, show_spinner=False)
+def query_catalog(companies, categories, sources, date_range):
+    # Server-side filtering: only the matching listing rows leave Mongo
+    query = build_filter_query(companies, categories, sources, date_range)
+    return CatalogSnapshot.from_docs(load_catalog(collection, query=query))
+
+
+metrics = perf.start_rerun()
+mongo_client = get_mongo_client()
 collection = mongo_client["CAG_CHATBOT"]["ResearchReportTest4dot1"]
 
 initialize_session_state()
-authenticate_user()
+with perf.timer("auth"):
+    authenticate_user()
 
 if st.session_state.logged_in:
+    import pandas as pd
+    import streamlit.components.v1 as components
+    from report_catalog import (
+        ANALYSED_QUERY, CatalogCache, CatalogSnapshot, build_filter_query, distinct_options,
+        SORT_COLUMNS, display_frame, ensure_indexes, filter_catalog, load_catalog, load_report, page_count, page_slice,
+    )
+    from report_renderer import FIELD_ORDER, render_sectoral_report
+    from report_export import EXPORT_FORMATS, export_jsonl, export_zip, new_export_file, read_export, sweep_exports
+    from report_facts import RATINGS, FactStore, query_calls
+    from report_compare import compare_kpis, compare_summary, target_price_stats
+    from report_search import ReportSearchIndex
+    from report_store import BlobStore, HtmlDirStore, report_cache
+    report_cache.max_bytes = REPORT_CACHE_MAX_BYTES
 
     st.set_page_config(page_title="Research Report Explorer", layout="wide")
     st.title("📊 Equity Research Report Explorer")
 
-    # Preferred sectoral report field order
-    FIELD_ORDER = [
-        "sector", "period_covered", "analysts", "executive_summary",
-        "overall_sentiment", "overall_sentiment_triggers", "sector_highlights",
-        "industry_metrics_tables", "charts_and_figures", "macro_trends",
-        "headwinds_tailwinds", "key_statistics", "top_companies", "weak_companies",
-        "company_wise_detail", "conclusion", "data_sources", "sector_specific"
-    ]
-    # Fetch all processed reports
-    docs = list(collection.find({"status": "analysed"}))
-    if not docs:
+    server_side = st.sidebar.toggle("Server-side filtering", value=SERVER_SIDE_FILTERS)
+    ensure_catalog_indexes()
+    with perf.timer("catalog_load"):
+        if server_side:
+            options = get_filter_options()
+        else:
+            # Listing fields of all processed reports, shared across sessions (bodies load on demand)
+            catalog_cache = get_catalog_cache()
+            catalog = catalog_cache.get()
+            options = {name: catalog.options(name) for name in ("company", "category", "source")}
+    if not server_side and not catalog.by_id:
         st.warning("No processed reports available.")
         st.stop()
 
-    # DataFrame for sidebar/table
-    df = pd.DataFrame([{
-        "PDF ID": doc["_id"],
-        "Title": doc.get("title", ""),
-        "Company Names": ", ".join(doc.get("company_names", [])),
-        "Category": doc.get("category"),
-        "Auto Category": doc.get("auto_category"),
-        "Published Date": doc.get("published_date"),
-        "Source": doc.get("metadata", {}).get("source"),
-        "Preview": doc.get("metadata", {}).get("text_preview", ""),
-        "File Name": doc.get("file_name", doc.get("metadata", {}).get("file_name")),
-    } for doc in docs])
-
     # Sidebar filters
     with st.sidebar:
         st.header("🔍 Filters")
-        companies = st.multiselect(
-            "Company",
-            sorted(set(sum([doc.get("company_names", []) for doc in docs], [])))
-        )
-        categories = st.multiselect("Category", sorted(df["Category"].dropna().unique()))
-        sources = st.multiselect("Source", sorted(df["Source"].dropna().unique()))
+        search_text = st.text_input("Search report content", placeholder="e.g. quick commerce margins")
+        companies = st.multiselect("Company", options["company"])
+        categories = st.multiselect("Category", options["category"])
+        sources = st.multiselect("Source", options["source"])
         date_range = st.date_input("Date Range", [])
 
-    # Apply filters
-    filtered_df = df.copy()
-    if companies:
-        filtered_df = filtered_df[filtered_df["Company Names"].apply(lambda x: any(c in x for c in companies))]
-    if categories:
-        filtered_df = filtered_df[filtered_df["Category"].isin(categories)]
-    if sources:
-        filtered_df = filtered_df[filtered_df["Source"].isin(sources)]
-    if len(date_range) == 2:
-        start, end = map(lambda d: d.strftime("%Y-%m-%d"), date_range)
-        filtered_df = filtered_df[
-            filtered_df["Published Date"].between(start, end)
-        ]
+        if server_side:
+            if st.button("🔄 Refresh catalog"):
+                get_filter_options.clear()
+                query_catalog.clear()
+                st.rerun()
+        else:
+            if st.button("🔄 Refresh catalog"):
+                catalog_cache.invalidate()
+                st.rerun()
+            stats = catalog_cache.stats()
+            st.caption(
+                f"Catalog cache: {stats['hits']} hits / {stats['misses']} misses, "
+                f"{stats['reports']} reports, age {stats['age_seconds']}s (TTL {stats['ttl_seconds']}s), "
+                f"{stats['mode']} refresh: {stats['last_refresh_changes']} changes, "
+                f"{stats['frame_bytes'] / 1024 / 1024:.1f} MB frame ({stats['bytes_per_report']} B/report)"
+                + (" · started from disk snapshot, reconciling with Mongo" if stats["reconciling"] else "")
+            )
+        html_stats = report_cache.stats()
+        st.caption(
+            f"Report cache: {html_stats['entries']} reports, "
+            f"{html_stats['resident_bytes'] / 1024 / 1024:.1f} / {html_stats['max_bytes'] / 1024 / 1024:.0f} MB, "
+            f"hit rate {html_stats['hit_rate']}, {html_stats['evictions']} evictions"
+        )
+        store_stats = get_report_store().stats()
+        if store_stats and not store_stats["reports"]:
+            st.caption("Report store: empty" + (", importing html_files/..." if get_report_store().importing else ""))
+        elif store_stats:
+            st.caption(
+                f"Report store: {store_stats['reports']} reports in {store_stats['blobs']} blobs, "
+                f"{store_stats['stored_bytes'] / 1024 / 1024:.1f} MB stored ({store_stats['ratio']}x compression)"
+            )
+
+    # Apply filters: in Mongo (server-side) or as one mask over the cached catalog indexes
+    with perf.timer("filter"):
+        if server_side:
+            catalog = query_catalog(tuple(companies), tuple(categories), tuple(sources), tuple(date_range))
+            filtered_df = catalog.df
+        else:
+            filtered_df = filter_catalog(catalog, companies, categories, sources, date_range)
+
+    # Full-text search: ranked hits from the local index, kept in relevance order
+    snippets = {}
+    if search_text:
+        search_index = get_search_index()
+        with perf.timer("search_sync"):
+            search_index.sync_in_background(min_interval=CATALOG_TTL_SECONDS)
+        if search_index.syncing:
+            st.caption("Indexing new reports; results may be incomplete until it finishes.")
+        with perf.timer("search"):
+            # Ranked within the filtered reports, so narrow filters don't lose their matches
+            unfiltered = not server_side and len(filtered_df) == len(catalog.by_id)
+            hits = search_index.search(search_text, limit=500, pdf_ids=None if unfiltered else filtered_df.index)
+            snippets = {hit["pdf_id"]: hit["snippet"] for hit in hits}
+        filtered_df = filtered_df.loc[[pdf_id for pdf_id in snippets if pdf_id in filtered_df.index]]
+
+    # Deep link (?report=<PDF ID>) shows that single report via the id index
+    linked_id = st.query_params.get("report")
+    if linked_id:
+        if server_side and not catalog.get(linked_id):
+            catalog = CatalogSnapshot.from_docs(load_catalog(collection, query=dict(ANALYSED_QUERY, _id=linked_id)))
+        if catalog.get(linked_id):
+            filtered_df = catalog.rows([linked_id])
+            if st.button("✖ Show all reports"):
+                del st.query_params["report"]
+                st.rerun()
+        else:
+            st.warning(f"Report {linked_id} not found.")
     def http_file_url(pdf_id):
         # Returns the URL where your local HTTP server serves the HTML file
         return f"html_files/{pdf_id}_report.html"
         # return f"html_files/{pdf_id}_report.html"
-    # Display filtered results
-    st.markdown(f"**Results: {len(filtered_df)} reports**")
+    report_store = get_report_store()
+    if REPORT_BACKEND == "blobs":
+        with perf.timer("store_sync"):
+            # Imports happen in render_reports --store / report_store.py, or off-thread here
+            report_store.reload()
+            report_store.import_in_background(min_interval=CATALOG_TTL_SECONDS)
+    fact_store = get_fact_store()
+    with perf.timer("facts_sync"):
+        fact_store.sync_in_background(catalog_docs=None if server_side else catalog.by_id, min_interval=CATALOG_TTL_SECONDS)
 
+    with st.expander("📈 Recommendation screener"):
+        if fact_store.syncing:
+            st.caption("Extracting facts from new reports; results will fill in on a later rerun.")
+        screen_col, rating_col, days_col = st.columns(3)
+        screen_company = screen_col.text_input("Company contains", key="screen_company")
+        screen_ratings = rating_col.multiselect("Rating", RATINGS, key="screen_ratings")
+        screen_days = days_col.number_input("Published in last N days (0 = any)", min_value=0, value=90, step=30)
+        calls = query_calls(fact_store.facts, screen_company, screen_ratings, days=screen_days)
+        st.dataframe(
+            calls[["published_date", "company", "broker", "rating", "target_price", "current_price",
+                   "upside_pct", "time_horizon", "price_band", "overall_sentiment", "company_sentiment", "pdf_id"]],
+            hide_index=True,
+        )
 
-    for _, row in filtered_df.iterrows():
-        doc = next((d for d in docs if d["_id"] == row["PDF ID"]), None)
+    with st.expander("⚖️ Compare a company across brokers"):
+        compare_company = st.selectbox("Company", options["company"], index=None, key="compare_company")
+        if compare_company:
+            pdf_ids = company_report_ids(compare_company)
+            summary, stats = company_comparison(compare_company, pdf_ids, fact_store.version)
+            if summary.empty:
+                st.info("No extracted facts for this company's reports yet.")
+            else:
+                st.markdown(
+                    f"**{stats['reports']} reports**, {stats['with_target']} with a target price"
+                    + (f" (mean {stats['mean_target']}, range {stats['min_target']}–{stats['max_target']})" if stats["with_target"] else "")
+                    + (f" · Ratings: {', '.join(f'{k} ×{v}' for k, v in stats['ratings'].items())}" if stats["ratings"] else "")
+                )
+                st.dataframe(summary)
+                kpi_table, periods = company_kpi_comparison(compare_company, pdf_ids, fact_store.version, None)
+                if periods:
+                    period = st.selectbox("KPI period", periods, index=None, placeholder="Most reported period")
+                    if period:
+                        kpi_table, _ = company_kpi_comparison(compare_company, pdf_ids, fact_store.version, period)
+                    st.dataframe(kpi_table)
 
-        if not doc:
-            continue
-        with st.expander(f"📄 {row['Title']} — ({row['Category']})"):
-            col1, col2 = st.columns([3, 1])
-            with col1:
-                st.markdown(f"**PDF ID:** {row['PDF ID']}")
-                st.markdown(f"**Published Date:** {row['Published Date']}")
-                st.markdown(f"**Source:** {row['Source']}")
-                st.markdown(f"**Category:** {row['Category']}")
-                # st.markdown(f"**Preview:**\n{row['Preview'][:500]}...")
+    with st.expander(f"📦 Export these {len(filtered_df)} reports"):
+        export_format = st.radio(
+            "Format", list(EXPORT_FORMATS), horizontal=True,
+            format_func={"zip": "ZIP of HTML reports", "jsonl": "JSONL of analysis documents"}.get,
+        )
+        if len(filtered_df) > EXPORT_MAX_REPORTS:
+            st.warning(f"Narrow the filters to at most {EXPORT_MAX_REPORTS} reports to export.")
+        elif len(filtered_df) and st.button("Prepare export"):
+            progress_bar = st.progress(0.0, text="Exporting...")
 
-                file_path = os.path.join(
-                    r"html_files", f"{row['PDF ID']}_report.html"
-                )
-                if os.path.exists(file_path):
-                    # Open in new tab (served by local HTTP server)
-                    with st.expander("Open Report"):
-                        file_url = http_file_url(row["PDF ID"])
-                        with open(file_url, "r", encoding="utf-8") as f:
-                            html_content = f.read()
-                        components.html(html_content, height=800, scrolling=True)
-                    
-                    # st.markdown(
-                    #     f'<a href="{file_url}" target="_blank">🌐 Open HTML Report in New Tab</a>',
-                    #     unsafe_allow_html=True
-                    # )
-                    # Download button
-                    with open(file_path, "rb") as f:
-                        st.download_button(
-                            label="⬇️ Download HTML Report",
-                            data=f,
-                            file_name=f"{row['PDF ID']}_report.html",
-                            mime="text/html",
-                            key=row["PDF ID"]+"_download_html"
-                        )
+            def export_progress(done, total):
+                progress_bar.progress(done / total, text=f"{done} / {total} reports")
+
+            # Written to a temp file as reports arrive; only the finished archive is read back on download
+            previous = st.session_state.pop("export", None)
+            if previous and os.path.exists(previous["path"]):
+                os.remove(previous["path"])
+            # Also drops archives left behind by sessions that ended without another export
+            sweep_exports(EXPORT_TTL_SECONDS)
+            fd, path = new_export_file(export_format)
+            with perf.timer("bulk_export"), os.fdopen(fd, "wb") as f:
+                if export_format == "zip":
+                    missing = export_zip(filtered_df.index, report_store, f, progress=export_progress)
                 else:
-                    st.info("HTML report file not found.")
+                    missing = export_jsonl(filtered_df.index, collection, f, progress=export_progress)
+            st.session_state.export = {
+                "path": path,
+                "file_name": f"reports_{datetime.now():%Y%m%d_%H%M}.{export_format}",
+                "mime": EXPORT_FORMATS[export_format],
+                "count": len(filtered_df) - len(missing),
+                "missing": len(missing),
+            }
+        export = st.session_state.get("export")
+        if export and os.path.exists(export["path"]):
+            st.download_button(
+                label=f"⬇️ Download {export['count']} reports ({os.path.getsize(export['path']) / 1024 / 1024:.1f} MB)",
+                data=partial(read_export, export["path"]),
+                file_name=export["file_name"],
+                mime=export["mime"],
+            )
+            if export["missing"]:
+                st.caption(f"{export['missing']} reports had nothing stored and were skipped.")
+
+    # Display filtered results, one page at a time
+    st.markdown(f"**Results: {len(filtered_df)} reports**")
+
+    view_col, sort_col, order_col, size_col = st.columns(4)
+    view = view_col.radio("View", ["Reports", "Compact table"], horizontal=True)
+    sort_by = sort_col.selectbox("Sort by", (["Relevance"] if search_text else []) + list(SORT_COLUMNS))
+    order = order_col.selectbox("Order", ["Descending", "Ascending"])
+    page_size = size_col.selectbox("Page size", [10, 25, 50, 100], index=1)
+    pages = page_count(len(filtered_df), page_size)
+    page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, step=1)
+    page_df = display_frame(page_slice(filtered_df, SORT_COLUMNS.get(sort_by), order == "Descending", page, page_size))
+
+    with perf.timer("render_loop"):
+        if view == "Compact table":
+            st.dataframe(
+                page_df.assign(Link="?report=" + page_df["PDF ID"]),
+                hide_index=True,
+                column_config={"Link": st.column_config.LinkColumn("Link", display_text="🔗 Open")},
+            )
+            perf.count("result_elements")
+        else:
+            for row in page_df.to_dict("records"):
+                perf.count("report_rows")
+                # Every element this row emits: expander, 2 columns, 4 markdowns, link + what follows
+                perf.count("result_elements", 8)
+                with st.expander(f"📄 {row['Title']} — ({row['Category']})"):
+                    col1, col2 = st.columns([3, 1])
+                    with col1:
+                        st.markdown(f"**PDF ID:** {row['PDF ID']}")
+                        st.markdown(f"**Published Date:** {row['Published Date']}")
+                        st.markdown(f"**Source:** {row['Source']}")
+                        st.markdown(f"**Category:** {row['Category']}")
+                        if row["PDF ID"] in snippets:
+                            st.caption(snippets[row["PDF ID"]])
+                            perf.count("result_elements")
+                        # st.markdown(f"**Preview:**\n{row['Preview'][:500]}...")
+
+                        if report_store.exists(row["PDF ID"]):
+                            # Report body is read from disk only once the user opens it
+                            if st.toggle("Open Report", key=row["PDF ID"] + "_open_report"):
+                                components.html(report_store.read_report(row["PDF ID"]), height=800, scrolling=True)
+                                perf.count("result_elements")
+
+                            # st.markdown(
+                            #     f'<a href="{file_url}" target="_blank">🌐 Open HTML Report in New Tab</a>',
+                            #     unsafe_allow_html=True
+                            # )
+                            # Download button: the file is read only when the button is clicked
+                            st.download_button(
+                                label="⬇️ Download HTML Report",
+                                data=partial(report_store.read_report_bytes, row["PDF ID"]),
+                                file_name=f"{row['PDF ID']}_report.html",
+                                mime="text/html",
+                                key=row["PDF ID"]+"_download_html"
+                            )
+                            perf.count("result_elements", 2)
+                        else:
+                            st.info("HTML report file not found.")
+                            perf.count("result_elements", 2)
+                            if st.toggle("Render from analysis", key=row["PDF ID"] + "_render_analysis"):
+                                doc = load_report(collection, row["PDF ID"])
+                                if doc:
+                                    components.html(render_sectoral_report(doc, FIELD_ORDER), height=800, scrolling=True)
+                                    perf.count("result_elements")
+
+                    with col2:
+                        st.markdown(f"[🔗 Link to report](?report={row['PDF ID']})")
 
-            with col2:
-                pass
+    # Timings for this rerun: one JSON log line, plus a sidebar panel for admins
+    rerun_summary = metrics.log(user=st.session_state.username, server_side=server_side) if PERF_LOG else metrics.summary()
+    if st.session_state.purpose in PERF_PANEL_PURPOSES:
+        with st.sidebar.expander("⏱️ Rerun performance"):
+            st.metric("Rerun time", f"{rerun_summary['total_ms']:.0f} ms")
+            st.dataframe(
+                pd.DataFrame({
+                    "ms": rerun_summary["timings_ms"],
+                    "calls": rerun_summary["calls"],
+                }).sort_values("ms", ascending=False),
+            )
+            st.dataframe(pd.Series(rerun_summary["counters"], name="count", dtype="int64"))
@@ -0,0 +1,53 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from passwords import SCRYPT_N, hash_password, is_hashed, needs_rehash, verify_password  # noqa: E402
+
+
+def test_hash_round_trip():
+    stored = hash_password("s3cret pässword")
+    assert is_hashed(stored)
+    assert stored.startswith(f"scrypt${SCRYPT_N}$")
+    assert verify_password("s3cret pässword", stored)
+    assert not verify_password("s3cret password", stored)
+    assert not needs_rehash(stored)
+
+
+def test_hashes_are_salted():
+    assert hash_password("same") != hash_password("same")
+
+
+def test_legacy_plaintext_records():
+    assert verify_password("hunter2", "hunter2")
+    assert not verify_password("hunter3", "hunter2")
+    assert needs_rehash("hunter2")
+
+
+def test_empty_inputs_never_verify():
+    assert not verify_password("", "")
+    assert not verify_password("", hash_password("x"))
+    assert not verify_password("x", None)
+
+
+def test_weaker_parameters_need_rehash():
+    stored = hash_password("pw", n=2 ** 10)
+    assert verify_password("pw", stored)
+    assert needs_rehash(stored)
+
+
+@pytest.mark.parametrize("stored", [
+    "scrypt$",
+    "scrypt$16384$8$1$onlyfive",
+    "scrypt$abc$8$1$c2FsdA==$ZGlnZXN0",
+    "scrypt$16384$8$1$not base64!$ZGlnZXN0",
+    "scrypt$1000$8$1$c2FsdA==$ZGlnZXN0",
+    "scrypt$1099511627776$8$1$c2FsdA==$ZGlnZXN0",
+    "scrypt$16384$8$1$c2FsdA==$",
+])
+def test_malformed_hashes_fail_closed(stored):
+    assert not verify_password("pw", stored)
+    assert needs_rehash(stored)
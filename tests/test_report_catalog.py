@@ -0,0 +1,143 @@
+import datetime
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+mongomock = pytest.importorskip("mongomock")
+
+from report_catalog import CatalogCache, CatalogSnapshot, load_snapshot, save_snapshot  # noqa: E402
+
+T0 = datetime.datetime(2025, 6, 1)
+
+
+def catalog_doc(i, **fields):
+    doc = {
+        "_id": f"researchreportss_{i}",
+        "status": "analysed",
+        "title": f"Report {i}",
+        "company_names": ["Swiggy"],
+        "category": "Sectoral",
+        "published_date": "2025-06-01",
+        "metadata": {"source": "Kotak"},
+        "updated_at": T0 + datetime.timedelta(minutes=i),
+    }
+    doc.update(fields)
+    return doc
+
+
+@pytest.fixture
+def collection():
+    collection = mongomock.MongoClient().db.reports
+    collection.insert_many([catalog_doc(i) for i in range(5)])
+    return collection
+
+
+class StubStream:
+    def __init__(self, events):
+        self.events = list(events)
+
+    def try_next(self):
+        return self.events.pop(0) if self.events else None
+
+    def close(self):
+        pass
+
+
+def test_polling_picks_up_new_and_unanalysed_reports(collection):
+    cache = CatalogCache(collection, ttl=0)
+    assert len(cache.get().by_id) == 5
+    assert cache.mode == "polling"
+
+    later = T0 + datetime.timedelta(days=1)
+    collection.insert_one(catalog_doc(10, updated_at=later))
+    collection.update_one({"_id": "researchreportss_1"}, {"$set": {"status": "pending", "updated_at": later}})
+    collection.update_one({"_id": "researchreportss_2"}, {"$set": {"title": "Renamed", "updated_at": later}})
+
+    snapshot = cache.get()
+    assert set(snapshot.by_id) == {"researchreportss_0", "researchreportss_2", "researchreportss_3",
+                                   "researchreportss_4", "researchreportss_10"}
+    assert snapshot.get("researchreportss_2")["title"] == "Renamed"
+    assert snapshot.watermark == later
+    assert cache.last_refresh_changes == 3
+
+    # Nothing new since the watermark
+    cache.get()
+    assert cache.last_refresh_changes == 0
+
+
+def test_polling_without_watermark_reloads_fully():
+    collection = mongomock.MongoClient().db.reports
+    collection.insert_many([{k: v for k, v in catalog_doc(i).items() if k != "updated_at"} for i in range(3)])
+    cache = CatalogCache(collection, ttl=0)
+    assert cache.get().watermark is None
+
+    collection.insert_one({k: v for k, v in catalog_doc(3).items() if k != "updated_at"})
+    collection.delete_one({"_id": "researchreportss_0"})
+    assert set(cache.get().by_id) == {"researchreportss_1", "researchreportss_2", "researchreportss_3"}
+
+
+def test_change_stream_events_update_the_snapshot(collection):
+    cache = CatalogCache(collection, ttl=0)
+    cache.get()
+    # Events as the projected stream delivers them: no _id inside fullDocument
+    cache._stream = StubStream([
+        {"operationType": "update", "documentKey": {"_id": "researchreportss_1"},
+         "fullDocument": {k: v for k, v in catalog_doc(1, title="Revised").items() if k != "_id"}},
+        {"operationType": "insert", "documentKey": {"_id": "researchreportss_7"},
+         "fullDocument": {k: v for k, v in catalog_doc(7).items() if k != "_id"}},
+        {"operationType": "update", "documentKey": {"_id": "researchreportss_2"},
+         "fullDocument": {"status": "pending"}},
+        {"operationType": "delete", "documentKey": {"_id": "researchreportss_3"}},
+    ])
+    assert cache.mode == "change_stream"
+
+    snapshot = cache.get()
+    assert set(snapshot.by_id) == {"researchreportss_0", "researchreportss_1", "researchreportss_4",
+                                   "researchreportss_7"}
+    assert snapshot.get("researchreportss_1")["title"] == "Revised"
+    assert snapshot.get("researchreportss_7")["_id"] == "researchreportss_7"
+    assert set(snapshot.df.index) == set(snapshot.by_id)
+    assert cache.last_refresh_changes == 4
+
+
+def test_snapshot_round_trip_keeps_fields_missing_from_the_first_doc(tmp_path):
+    sparse = {"_id": "researchreportss_0", "title": "Sparse"}
+    docs = [sparse, catalog_doc(1, auto_category="IPO", file_name="report_1.pdf")]
+    snapshot = CatalogSnapshot.from_docs(docs)
+    snapshot.watermark = T0 + datetime.timedelta(days=2)
+    path = str(tmp_path / "catalog_snapshot.parquet")
+    save_snapshot(snapshot, path)
+
+    loaded = load_snapshot(path)
+    assert loaded.get("researchreportss_0") == sparse
+    assert loaded.get("researchreportss_1") == {k: v for k, v in docs[1].items() if k != "status"}
+    assert loaded.watermark == T0 + datetime.timedelta(days=2)
+    assert loaded.df.loc["researchreportss_1", "Published Date"] == pd.Timestamp("2025-06-01")
+
+
+def test_unlisted_pending_reports_are_not_changes(collection):
+    cache = CatalogCache(collection, ttl=0)
+    snapshot = cache.get()
+    later = T0 + datetime.timedelta(days=1)
+    collection.insert_one(catalog_doc(20, status="pending", updated_at=later))
+
+    assert cache.get() is snapshot
+    assert cache.last_refresh_changes == 0
+    # The watermark still moves past it, so it isn't polled again
+    assert snapshot.watermark == later
+
+
+def test_stream_events_for_unlisted_reports_are_not_changes(collection):
+    cache = CatalogCache(collection, ttl=0)
+    snapshot = cache.get()
+    cache._stream = StubStream([
+        {"operationType": "insert", "documentKey": {"_id": "researchreportss_20"},
+         "fullDocument": {"status": "pending"}},
+        {"operationType": "delete", "documentKey": {"_id": "researchreportss_21"}},
+    ])
+    assert cache.get() is snapshot
+    assert cache.last_refresh_changes == 0
@@ -0,0 +1,29 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from report_compare import compare_kpis, compare_summary, period_key  # noqa: E402
+from report_facts import FactStore  # noqa: E402
+
+SWIGGY_REPORTS = ["test_report03_swiggy", "test_report04_swiggy", "test_report05_swiggy"]
+
+
+def test_period_key():
+    assert {period_key(p) for p in ("FY26E", "FY26e", "FY26ii", "FY 26", "FY2026")} == {"FY26"}
+    assert period_key("FY25A") == "FY25"
+    assert period_key("H1FY25") == "H1FY25"
+
+
+def test_compare_kpis_lines_up_every_broker(tmp_path):
+    store = FactStore(str(tmp_path))
+    store.sync(os.path.join(ROOT, "html_files"))
+    table, periods = compare_kpis(store.kpis, store.facts, "Swiggy", SWIGGY_REPORTS, "FY25")
+    assert all(period.startswith("FY") for period in periods)
+    assert len(table.columns) == 3
+    assert any("IIFL Research" in column for column in table.columns)
+
+
+def test_compare_summary_without_facts(tmp_path):
+    assert compare_summary(FactStore(str(tmp_path)).facts, "Swiggy", SWIGGY_REPORTS).empty
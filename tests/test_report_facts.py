@@ -0,0 +1,70 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from report_facts import extract_report_facts, is_period, normalise_rating, parse_number  # noqa: E402
+from report_store import scan_reports  # noqa: E402
+
+HTML_DIR = os.path.join(ROOT, "html_files")
+
+
+def facts_for(pdf_id):
+    with open(os.path.join(HTML_DIR, f"{pdf_id}_report.html"), encoding="utf-8") as f:
+        return extract_report_facts(pdf_id, f.read())
+
+
+def test_parse_number_and_rating():
+    assert parse_number("Rs 1,601.5") == 1601.5
+    assert parse_number("-19.6%") == -19.6
+    assert parse_number("n/a") is None
+    assert normalise_rating("Strong Buy (upgrade)") == "STRONG BUY"
+    assert normalise_rating("rated 'avoid'") == "AVOID"
+    assert normalise_rating("no call") is None
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("FY25", True), ("FY26E", True), ("2026E", True), ("H1FY25", True), ("FY26ii", True),
+    ("Revenue (Rs mn)", False), ("EBITDA margins (%)", False), ("Year", False),
+])
+def test_is_period(text, expected):
+    assert is_period(text) == expected
+
+
+def test_recommendation_table():
+    rows, _ = facts_for("test_report04_swiggy")
+    assert rows[0]["company"] == "Swiggy"
+    assert rows[0]["rating"] == "BUY"
+    assert rows[0]["target_price"] == 535.0
+    assert rows[0]["broker"] == "IIFL Research"
+
+
+def test_kpis_with_periods_down_the_first_column():
+    _, kpis = facts_for("test_report03_swiggy")
+    revenue = {k["period"]: k["value_num"] for k in kpis if k["metric"] == "Revenue (INR mn)"}
+    assert revenue["FY24"] == 112474
+
+
+def test_kpis_with_periods_across_the_header():
+    # Header "Year, FY24A, FY25A, ..." with one metric per row
+    _, kpis = facts_for("test_report04_swiggy")
+    revenue = {k["period"]: k["value_num"] for k in kpis if k["metric"] == "Revenues (Rs mn)"}
+    assert revenue["FY24A"] == 112474
+    assert revenue["FY25A"] == 152268
+
+
+def test_kpis_in_long_format():
+    # Header "Date, Metric, Value"
+    _, kpis = facts_for("researchreportss_68873")
+    assert ("H1FY25", "EBITDA Margin", "22.6%") in {(k["period"], k["metric"], k["value"]) for k in kpis}
+
+
+def test_shipped_reports_have_periods_as_periods():
+    for pdf_id, (path, version) in scan_reports(HTML_DIR).items():
+        with open(path, encoding="utf-8") as f:
+            _, kpis = extract_report_facts(pdf_id, f.read(), version)
+        assert all(is_period(k["period"]) for k in kpis), pdf_id
+        assert not any(is_period(k["metric"]) for k in kpis), pdf_id